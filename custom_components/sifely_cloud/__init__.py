@@ -1,11 +1,15 @@
 # __init__.py
 import logging
+import time
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .token_manager import SifelyTokenManager
+from .token_manager import SifelyTokenManager, get_token_store
 from .sifely import setup_sifely_coordinator
+from .snapshot import get_snapshot_store
+from .backfill import get_backfill_store
+from .services import async_setup_services
 from .const import (
     DOMAIN,
     CONF_EMAIL,
@@ -19,7 +23,8 @@ _LOGGER = logging.getLogger(__name__)
 
 
 async def async_setup(hass: HomeAssistant, config: dict):
-    """Handle YAML setup (unused)."""
+    """Handle YAML setup (unused) and register services."""
+    async_setup_services(hass)
     return True
 
 
@@ -52,9 +57,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         config_entry=entry,
     )
 
+    started = time.monotonic()
     try:
         await token_manager.initialize()
+        token_ready = time.monotonic()
         coordinator = await setup_sifely_coordinator(hass, token_manager, entry)
+        coordinator.setup_timings["token"] = round(token_ready - started, 3)
         _LOGGER.info("✅ Sifely token manager and coordinator initialized successfully.")
     except Exception as e:
         _LOGGER.exception("❌ Failed to initialize Sifely integration")
@@ -70,13 +78,21 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     entry.async_on_unload(entry.add_update_listener(options_update_listener))
 
     # Forward entry setup to platforms
+    platforms_started = time.monotonic()
     await hass.config_entries.async_forward_entry_setups(entry, SUPPORTED_PLATFORMS)
+    coordinator.setup_timings["platforms"] = round(time.monotonic() - platforms_started, 3)
+    coordinator.setup_timings["setup_total"] = round(time.monotonic() - started, 3)
+    _LOGGER.info("⏱️ Sifely Cloud setup finished in %.3fs (details/state loading in background)",
+                 coordinator.setup_timings["setup_total"])
 
     return True
 
 
 async def options_update_listener(hass: HomeAssistant, config_entry: ConfigEntry):
-    """Handle options update by reloading the config entry."""
+    """Handle options update by reloading the config entry.
+
+    Tokens live in their own store, so options only change when the user edits settings.
+    """
     await hass.config_entries.async_reload(config_entry.entry_id)
 
 
@@ -99,3 +115,10 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
             await token_manager.async_shutdown()
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Delete persisted tokens, the lock snapshot and backfill cursors when the integration is removed."""
+    await get_token_store(hass, entry.entry_id).async_remove()
+    await get_snapshot_store(hass, entry.entry_id).async_remove()
+    await get_backfill_store(hass, entry.entry_id).async_remove()
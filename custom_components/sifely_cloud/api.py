@@ -0,0 +1,234 @@
+"""Sifely Cloud API client: headers, response decoding, error classification and timing."""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+
+from .const import (
+    GATEWAY_BUSY_CODE,
+    RETRY_BASE_DELAY,
+    RETRY_GATEWAY_BUSY_DELAY,
+    RETRY_MAX_DELAY,
+    RETRY_DEFAULT_ATTEMPTS,
+    RETRY_ATTEMPTS,
+    DEFAULT_REQUEST_TIMEOUT,
+    REQUEST_TIMEOUTS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SifelyApiError(Exception):
+    """Base error for a failed Sifely Cloud request."""
+
+    def __init__(self, message: str, status: int | None = None, code: int | None = None, payload=None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.payload = payload
+
+
+class SifelyConnectionError(SifelyApiError):
+    """The request never got an HTTP response (network error or timeout)."""
+
+
+class SifelyHttpError(SifelyApiError):
+    """The cloud answered with a non-200 HTTP status."""
+
+
+class SifelyUnauthorizedError(SifelyHttpError):
+    """HTTP 401 that persisted after a token refresh."""
+
+
+class SifelyResponseError(SifelyApiError):
+    """The body was not JSON, or carried a failure code/errcode."""
+
+
+class SifelyGatewayBusyError(SifelyResponseError):
+    """The lock's gateway is busy (code -3003); the same request may succeed shortly."""
+
+
+def decode_response(status: int, text: str, require_code: bool = False):
+    """Decode a Sifely response body and raise a typed error for failures.
+
+    The cloud uses several shapes: {"code": 200, "data": {...}} wrappers, raw objects
+    (lock detail, open state, token refresh), {"errcode": 0} for commands and
+    {"list": [...]} pages. Wrapped payloads are returned unwrapped; the others as-is.
+    With require_code (commands), a body without code == 200 or errcode == 0 is an
+    error rather than success.
+    """
+    if status == 401:
+        raise SifelyUnauthorizedError("HTTP 401", status=status, payload=text)
+    if status != 200:
+        raise SifelyHttpError(f"HTTP {status}: {text[:200]}", status=status, payload=text)
+
+    try:
+        payload = json.loads(text)
+    except ValueError as e:
+        raise SifelyResponseError(f"Invalid JSON: {e}", status=status, payload=text)
+
+    if not isinstance(payload, dict):
+        return payload
+
+    code = payload.get("code", payload.get("errcode"))
+    if code == GATEWAY_BUSY_CODE:
+        raise SifelyGatewayBusyError("Gateway busy", status=status, code=code, payload=payload)
+
+    if "code" in payload:
+        if payload["code"] != 200:
+            raise SifelyResponseError(f"code {payload['code']}: {payload.get('msg')}", status=status, code=payload["code"], payload=payload)
+        return payload["data"] if "data" in payload else payload
+
+    if payload.get("errcode", 0) != 0:
+        raise SifelyResponseError(f"errcode {payload['errcode']}: {payload.get('errmsg')}", status=status, code=payload["errcode"], payload=payload)
+
+    if require_code and "errcode" not in payload:
+        raise SifelyResponseError(f"No success code in response: {payload}", status=status, payload=payload)
+
+    return payload
+
+
+def is_retryable(error: SifelyApiError) -> bool:
+    """Return True for failures that may succeed if the same request is sent again."""
+    if isinstance(error, (SifelyGatewayBusyError, SifelyConnectionError)):
+        return True
+    return isinstance(error, SifelyHttpError) and not isinstance(error, SifelyUnauthorizedError) \
+        and (error.status == 429 or error.status >= 500)
+
+
+def retry_delay(error: SifelyApiError, attempt: int) -> float:
+    """Return the capped exponential backoff (with jitter) before retry number attempt."""
+    base = RETRY_GATEWAY_BUSY_DELAY if isinstance(error, SifelyGatewayBusyError) else RETRY_BASE_DELAY
+    delay = min(RETRY_MAX_DELAY, base * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class SifelyApiClient:
+    """Send Sifely Cloud requests with token handling, per-lock busy backoff, retries and per-endpoint stats."""
+
+    def __init__(self, session: aiohttp.ClientSession, token_manager=None):
+        self.session = session
+        self.token_manager = token_manager
+        self.active_requests = 0
+        self._stats: dict[str, dict] = {}
+        self._busy_until: dict[int, float] = {}
+
+    async def async_request(
+        self,
+        method: str,
+        url: str,
+        *,
+        auth: bool = True,
+        lock_id: int | None = None,
+        require_code: bool = False,
+        wait_busy: bool = True,
+        **kwargs,
+    ):
+        """Send a request and return its decoded payload, raising SifelyApiError on failure.
+
+        Pass lock_id for per-lock endpoints so a busy gateway delays only that lock, and
+        require_code for commands, whose success must be stated explicitly. With
+        wait_busy=False a busy lock raises SifelyGatewayBusyError instead of sleeping.
+        """
+        attempts = RETRY_ATTEMPTS.get(url.split("?")[0], RETRY_DEFAULT_ATTEMPTS)
+        for attempt in range(1, attempts + 1):
+            if lock_id is not None:
+                wait = self.busy_remaining(lock_id)
+                if wait > 0:
+                    if not wait_busy:
+                        raise SifelyGatewayBusyError(f"Gateway busy for another {wait:.1f}s")
+                    await asyncio.sleep(wait)
+
+            try:
+                return await self._async_request_once(method, url, auth, require_code, **kwargs)
+            except SifelyApiError as e:
+                if attempt >= attempts or not is_retryable(e):
+                    raise
+                error = e
+
+            delay = retry_delay(error, attempt)
+            if lock_id is not None and isinstance(error, SifelyGatewayBusyError):
+                self._busy_until[lock_id] = max(self._busy_until.get(lock_id, 0), time.monotonic() + delay)
+                if not wait_busy:
+                    raise error
+            self._endpoint_stats(url)["retries"] += 1
+            _LOGGER.debug("⏳ %s for %s, retrying in %.1fs (attempt %d/%d)", error, url, delay, attempt + 1, attempts)
+            if lock_id is None or not isinstance(error, SifelyGatewayBusyError):
+                await asyncio.sleep(delay)
+
+    def busy_remaining(self, lock_id: int) -> float:
+        """Return how many seconds the lock's gateway is still considered busy (0 if not)."""
+        return max(0.0, self._busy_until.get(lock_id, 0) - time.monotonic())
+
+    async def _async_request_once(self, method: str, url: str, auth: bool, require_code: bool, **kwargs):
+        """Send one request (plus a single retry after a 401) and decode the response."""
+        for attempt in (1, 2):
+            headers = {"Content-Type": "application/x-www-form-urlencoded"}
+            token = None
+            if auth:
+                token = await self.token_manager.async_get_access_token()
+                headers["Authorization"] = f"Bearer {token}"
+
+            status, text = await self._async_send(method, url, headers, **kwargs)
+            _LOGGER.debug("🌐 %s %s -> %d: %s", method, urlparse(url).path, status, text)
+
+            if status == 401 and auth and attempt == 1:
+                _LOGGER.debug("🔁 401 from %s, refreshing token and retrying once", url)
+                if self.token_manager.access_token == token:
+                    await self.token_manager.async_request_refresh()
+                # else: another request already refreshed the token while this one was in flight
+                continue
+
+            try:
+                return decode_response(status, text, require_code)
+            except SifelyApiError as e:
+                self._record_error(url, e)
+                raise
+
+    async def _async_send(self, method: str, url: str, headers: dict, **kwargs) -> tuple[int, str]:
+        stats = self._endpoint_stats(url)
+        started = time.monotonic()
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUTS.get(url.split("?")[0], DEFAULT_REQUEST_TIMEOUT))
+        self.active_requests += 1
+        try:
+            async with self.session.request(method, url, headers=headers, timeout=timeout, **kwargs) as resp:
+                return resp.status, await resp.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = SifelyConnectionError(f"{type(e).__name__}: {e}")
+            self._record_error(url, error)
+            raise error from e
+        finally:
+            self.active_requests -= 1
+            elapsed = time.monotonic() - started
+            stats["requests"] += 1
+            stats["total_time"] += elapsed
+            stats["max_time"] = max(stats["max_time"], elapsed)
+
+    def _endpoint_stats(self, url: str) -> dict:
+        path = urlparse(url).path
+        if path not in self._stats:
+            self._stats[path] = {"requests": 0, "retries": 0, "errors": {}, "total_time": 0.0, "max_time": 0.0}
+        return self._stats[path]
+
+    def _record_error(self, url: str, error: SifelyApiError):
+        errors = self._endpoint_stats(url)["errors"]
+        kind = type(error).__name__
+        errors[kind] = errors.get(kind, 0) + 1
+
+    def stats(self) -> dict:
+        """Return per-endpoint request and retry counts, error counts by type and timings."""
+        return {
+            path: {
+                "requests": stats["requests"],
+                "retries": stats["retries"],
+                "errors": dict(stats["errors"]),
+                "avg_time": round(stats["total_time"] / stats["requests"], 3) if stats["requests"] else None,
+                "max_time": round(stats["max_time"], 3),
+            }
+            for path, stats in self._stats.items()
+        }
@@ -0,0 +1,142 @@
+"""Resumable, low-priority lock history backfill for Sifely Cloud."""
+
+import asyncio
+import logging
+import time
+
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    STORAGE_VERSION,
+    BACKFILL_STORAGE_KEY,
+    BACKFILL_REQUESTS_PER_RUN,
+    BACKFILL_IDLE_WAIT_SECONDS,
+    BACKFILL_SAVE_DELAY,
+    CONF_HISTORY_ENTRIES,
+    HISTORY_PAGE_SIZE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def get_backfill_store(hass, entry_id: str) -> Store:
+    """Return the persistent backfill cursor store for a config entry."""
+    return Store(hass, STORAGE_VERSION, BACKFILL_STORAGE_KEY.format(entry_id=entry_id))
+
+
+class SifelyHistoryBackfill:
+    """Walk each lock's cloud history backwards to a horizon, a few requests per run.
+
+    Each lock has a cursor (the oldest lockDate fetched so far). Every run spends at
+    most BACKFILL_REQUESTS_PER_RUN requests fetching the newest page older than the
+    cursor, and only while no other cloud request is in flight, so state polling and
+    lock commands are never queued behind it. Cursors are saved so a restart resumes
+    where the last run stopped.
+    """
+
+    def __init__(self, hass, coordinator, horizon_days: int):
+        self.hass = hass
+        self.coordinator = coordinator
+        self.horizon_days = horizon_days
+        self._store = get_backfill_store(hass, coordinator.config_entry.entry_id)
+        self._cursors: dict[str, dict] = {}
+        self._loaded = False
+        self._running = False
+        self.requests = 0
+        self.records = 0
+
+    @property
+    def horizon_ms(self) -> int:
+        return int((time.time() - self.horizon_days * 86400) * 1000)
+
+    async def _async_load(self):
+        if self._loaded:
+            return
+        self._cursors = (await self._store.async_load() or {}).get("cursors", {})
+        self._loaded = True
+
+    def _save(self):
+        self._store.async_delay_save(lambda: {"cursors": self._cursors}, BACKFILL_SAVE_DELAY)
+
+    def _next_lock(self) -> int | None:
+        """Return the next lock with history left to backfill.
+
+        A lock is only done once its cursor reaches the horizon; the history store
+        keeps every record inside the horizon when it compacts.
+        """
+        for lock in self.coordinator.lock_list:
+            lock_id = lock.get("lockId")
+            if not lock_id:
+                continue
+            cursor = self._cursors.get(str(lock_id))
+            if cursor and cursor.get("done"):
+                continue
+            return lock_id
+        return None
+
+    async def _async_wait_for_idle(self) -> bool:
+        """Wait briefly for foreground requests to finish; False means give up this run."""
+        deadline = time.monotonic() + BACKFILL_IDLE_WAIT_SECONDS
+        while self.coordinator.active_requests:
+            if time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(1)
+        return True
+
+    async def async_run(self, now=None):
+        """Spend this run's request budget on the oldest unfinished locks."""
+        if self.horizon_days <= 0 or self._running:
+            return
+
+        self._running = True
+        try:
+            await self._async_load()
+            limit = self.coordinator.config_entry.options.get(CONF_HISTORY_ENTRIES, 20)
+
+            for _ in range(BACKFILL_REQUESTS_PER_RUN):
+                lock_id = self._next_lock()
+                if lock_id is None or not await self._async_wait_for_idle():
+                    break
+
+                key = str(lock_id)
+                await self.coordinator.async_load_history_store([lock_id])
+                store = self.coordinator.history_store
+                before = self._cursors.get(key, {}).get("before") or store.oldest.get(lock_id) or int(time.time() * 1000)
+
+                self.requests += 1
+                page = await self.coordinator.async_fetch_history_page(
+                    lock_id, 1, HISTORY_PAGE_SIZE, start_date=self.horizon_ms, end_date=before - 1
+                )
+                if page is None:
+                    break  # Cloud trouble; try again next run from the same cursor
+
+                records = [entry for entry in page["list"] if entry.get("lockDate") is not None]
+                fresh_rows = store.merge(lock_id, records, limit)
+                if fresh_rows:
+                    store.queue(lock_id, fresh_rows)
+                    self.records += len(fresh_rows)
+
+                done = len(page["list"]) < HISTORY_PAGE_SIZE
+                oldest = min((entry["lockDate"] for entry in records), default=before)
+                self._cursors[key] = {"before": oldest, "done": done or oldest >= before}
+                self._save()
+
+                if self._cursors[key]["done"]:
+                    _LOGGER.info("📚 History backfill for %s reached its horizon", lock_id)
+
+            await self.coordinator.history_store.async_flush(self.hass)
+        finally:
+            self._running = False
+
+    def status(self) -> dict:
+        """Return backfill progress for diagnostics."""
+        return {
+            "horizon_days": self.horizon_days,
+            "requests": self.requests,
+            "records": self.records,
+            "locks_done": sum(1 for cursor in self._cursors.values() if cursor.get("done")),
+            "locks_total": len(self.coordinator.lock_list),
+        }
+
+    async def async_remove(self):
+        await self._store.async_remove()
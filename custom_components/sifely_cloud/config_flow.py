@@ -12,8 +12,17 @@ from .const import (
     CONF_EMAIL,
     CONF_PASSWORD,
     CONF_CLIENT_ID,
-    CONF_APX_NUM_LOCKS,
     CONF_HISTORY_ENTRIES,
+    CONF_POLL_CONCURRENCY,
+    DEFAULT_POLL_CONCURRENCY,
+    CONF_BACKFILL_DAYS,
+    DEFAULT_BACKFILL_DAYS,
+    CONF_STATE_POLL_FLOOR,
+    DEFAULT_STATE_POLL_FLOOR,
+    CONF_STATE_POLL_CEILING,
+    DEFAULT_STATE_POLL_CEILING,
+    CONF_OPTIMISTIC_LOCK,
+    DEFAULT_OPTIMISTIC_LOCK,
     LOGIN_ENDPOINT,
 )
 
@@ -74,7 +83,6 @@ class SifelyCloudConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     CONF_EMAIL: email,
                     CONF_PASSWORD: raw_password,
                     CONF_CLIENT_ID: client_id,
-                    CONF_APX_NUM_LOCKS: user_input[CONF_APX_NUM_LOCKS],
                     CONF_HISTORY_ENTRIES: user_input.get(CONF_HISTORY_ENTRIES, 20),
                 },
             )
@@ -87,7 +95,6 @@ class SifelyCloudConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             data_schema=vol.Schema({
                 vol.Required(CONF_EMAIL, default=user_input.get(CONF_EMAIL, "")): str,
                 vol.Required(CONF_PASSWORD, default=user_input.get(CONF_PASSWORD, "")): str,
-                vol.Required(CONF_APX_NUM_LOCKS, default=user_input.get(CONF_APX_NUM_LOCKS, 5)): vol.In([5, 10, 15, 20, 25, 30, 35, 40, 45, 50]),
                 vol.Required(CONF_HISTORY_ENTRIES, default=user_input.get(CONF_HISTORY_ENTRIES, 20)): vol.In([10, 20, 30, 40, 50, 60, 70, 80, 90, 100]),
             }),
             errors=errors
@@ -125,7 +132,11 @@ class SifelyCloudOptionsFlowHandler(config_entries.OptionsFlow):
                 vol.Required(CONF_EMAIL, default=default(CONF_EMAIL)): str,
                 vol.Required(CONF_PASSWORD, default=default(CONF_PASSWORD)): str,
                 vol.Required(CONF_CLIENT_ID, default=default(CONF_CLIENT_ID)): str,
-                vol.Required(CONF_APX_NUM_LOCKS, default=default(CONF_APX_NUM_LOCKS, '5' )): vol.In([5, 10, 15, 20, 25, 30, 35, 40, 45, 50]),
                 vol.Required(CONF_HISTORY_ENTRIES, default=default(CONF_HISTORY_ENTRIES, '20')): vol.In([10, 20, 30, 40, 50, 60, 70, 80, 90, 100]),
+                vol.Required(CONF_POLL_CONCURRENCY, default=default(CONF_POLL_CONCURRENCY, DEFAULT_POLL_CONCURRENCY)): vol.In([1, 2, 5, 10, 20]),
+                vol.Required(CONF_BACKFILL_DAYS, default=default(CONF_BACKFILL_DAYS, DEFAULT_BACKFILL_DAYS)): vol.In([0, 30, 90, 365, 1095, 3650]),
+                vol.Required(CONF_STATE_POLL_FLOOR, default=default(CONF_STATE_POLL_FLOOR, DEFAULT_STATE_POLL_FLOOR)): vol.In([5, 10, 15, 30, 60]),
+                vol.Required(CONF_STATE_POLL_CEILING, default=default(CONF_STATE_POLL_CEILING, DEFAULT_STATE_POLL_CEILING)): vol.In([60, 300, 600, 1800, 3600]),
+                vol.Required(CONF_OPTIMISTIC_LOCK, default=default(CONF_OPTIMISTIC_LOCK, DEFAULT_OPTIMISTIC_LOCK)): bool,
             }),
         )
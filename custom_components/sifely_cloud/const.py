@@ -12,20 +12,74 @@ ISSUE_URL = "https://github.com/kenster1965/sifely_cloud/issues"
 CONF_EMAIL = "User_Email"
 CONF_PASSWORD = "User_Password"
 CONF_CLIENT_ID = "clientId"
-CONF_APX_NUM_LOCKS = "apxNumLocks" # Approximate number of locks
 CONF_HISTORY_ENTRIES = "history_entries"  # Number of history records to keep
+CONF_POLL_CONCURRENCY = "poll_concurrency"  # Max concurrent cloud requests per poll cycle
+CONF_BACKFILL_DAYS = "backfill_days"  # How far back to backfill lock history (0 = disabled)
+CONF_STATE_POLL_FLOOR = "state_poll_floor"  # Fastest state-poll interval for an active lock
+CONF_STATE_POLL_CEILING = "state_poll_ceiling"  # Slowest state-poll interval for an idle lock
+CONF_OPTIMISTIC_LOCK = "optimistic_lock"  # Show the commanded lock state before the cloud confirms it
+DEFAULT_OPTIMISTIC_LOCK = False  # Opt-in: a door lock should not report "locked" before the cloud confirms it
+EVENT_LOCK_HISTORY = f"{DOMAIN}_history"  # Bus event fired once per new lock history record
+EVENT_EXPORT_COMPLETE = f"{DOMAIN}_export_complete"  # Bus event fired when a history export finishes
+
+# Services
+SERVICE_EXPORT_HISTORY = "export_history"
+
+# Persistent storage (.storage/) keys and versions
+STORAGE_VERSION = 1
+TOKEN_STORAGE_KEY = f"{DOMAIN}.{{entry_id}}.tokens"  # Auth tokens, kept out of config entry options
+TOKEN_OPTION_KEYS = ("access_token", "refresh_token", "token_expiry", "login_token")  # Legacy token keys in options
+SNAPSHOT_STORAGE_KEY = f"{DOMAIN}.{{entry_id}}.snapshot"  # Last-known lock list, details and open state
+BACKFILL_STORAGE_KEY = f"{DOMAIN}.{{entry_id}}.backfill"  # Per-lock history backfill cursors
+BACKFILL_SAVE_DELAY = 30  # Seconds to batch backfill cursor changes before writing
+SNAPSHOT_SAVE_DELAY = 300  # Seconds to batch snapshot changes before writing to disk
+SNAPSHOT_LOCK_FIELDS = ("lockId", "lockAlias", "lockName", "lockMac")  # Lock list fields kept in the snapshot
+SNAPSHOT_DETAIL_FIELDS = (  # Lock detail fields kept in the snapshot
+    "lockId", "electricQuantity", "firmwareRevision", "hardwareRevision", "keyboardPwdVersion",
+    "hasGateway", "isFrozen", "passageMode", "lockVersion", "privacyLock", "tamperAlert",
+)
 
 
 # Polling Intervals (in seconds)
 DETAILS_UPDATE_INTERVAL = 300    # e.g., 5 minutes for Lock details
 STATE_QUERY_INTERVAL = 60        # e.g., 60 seconds for Lock state
 HISTORY_INTERVAL = 3600          # e.g., 1 hour for Lock history
+DEFAULT_STATE_POLL_FLOOR = 15    # State-poll interval right after lock activity
+DEFAULT_STATE_POLL_CEILING = 600 # State-poll interval an idle lock backs off to
+STATE_POLL_ACTIVE_SECONDS = 300  # How long a lock stays at the floor after activity
+STATE_POLL_BACKOFF_FACTOR = 1.5  # Interval growth per unchanged state poll once idle
+STATE_POLL_TICK = 5              # Seconds between checks for lock polls that are due
+POLL_JITTER_FRACTION = 0.1       # Random +/- share of an interval added to each rescheduled poll
 
+HISTORY_STORAGE_DIR = f"{DOMAIN}/history"  # Under the HA config dir, survives integration updates
+HISTORY_MAX_RECORDS = 5000  # Records kept per lock history file after compaction
+HISTORY_COMPACT_SLACK = 500  # Extra records allowed to accumulate before a file is compacted
 HISTORY_DISPLAY_LIMIT = 20  # Limit for history fetching, max possible history records in for HISTORY_INTERVAL time
-LOCK_REQUEST_RETRIES = 3  # Number of retries for lock/unlock requests
+HISTORY_CACHE_TTL = HISTORY_INTERVAL - 60  # Seconds a lock's fetched history is served from cache
+HISTORY_PAGE_SIZE = 100  # Records per page when catching up from the last seen record
+HISTORY_SYNC_MAX_PAGES = 20  # Max pages fetched per lock in one catch-up
+HISTORY_EXPORT_MAX_PAGES = 10000  # Safety cap on pages walked by one history export
+HISTORY_EXPORT_DIR = f"{DOMAIN}/exports"  # Export folder under the HA config dir (or www/ when requested)
+HISTORY_SYNC_OVERLAP_SECONDS = 600  # Re-check this far before the newest stored record for late uploads
+HISTORY_INDEX_PRUNE_SIZE = 1000  # Indexed record ids per lock before ids older than the sync overlap are dropped
+DEFAULT_BACKFILL_DAYS = 365  # Default history backfill horizon
+BACKFILL_INTERVAL = 300  # Seconds between backfill runs
+BACKFILL_REQUESTS_PER_RUN = 5  # Cloud request budget per backfill run (~60/hour)
+BACKFILL_IDLE_WAIT_SECONDS = 30  # Max wait for foreground requests to finish before skipping a run
+LOCK_REQUEST_RETRIES = 3  # Number of attempts for lock/unlock requests
+LOCK_CONFIRM_TIMEOUT = 30  # Seconds to wait for a lock to report the commanded state
+LOCK_CONFIRM_INITIAL_DELAY = 1.0  # Seconds before the first confirmation poll; doubles per poll
+LOCK_CONFIRM_MAX_DELAY = 8.0  # Cap on the delay between confirmation polls
 TOKEN_REFRESH_BUFFER_MINUTES = 5 # Buffer time to refresh token early (before actual expiration)
+TOKEN_REUSE_AT_STARTUP = True  # Use a still-valid cached token at startup instead of forcing a refresh
+TOKEN_REFRESH_MAX_ATTEMPTS = 3  # Attempts per token refresh before giving up
+TOKEN_REFRESH_BACKOFF_SECONDS = 5  # Initial delay between refresh attempts, doubled each time
+TOKEN_REFRESH_RETRY_AFTER_FAILURE = 300  # Seconds before trying again after all attempts failed
 TOKEN_401s_BEFORE_REAUTH = 5  # Number of 401 errors before re-authentication
 TOKEN_401s_BEFORE_ALERT = 10  # Number of 401 errors before alerting user
+LOCK_LIST_PAGE_SIZE = 50  # Locks requested per lock list page
+LOCK_LIST_MAX_PAGES = 100  # Safety cap on lock list pages fetched in one refresh
+DEFAULT_POLL_CONCURRENCY = 5  # Concurrent per-lock requests per poll cycle (1 = sequential)
 
 
 # API endpoints
@@ -39,6 +93,44 @@ QUERY_STATE_ENDPOINT = f"{API_BASE_URL}/v3/lock/queryOpenState"
 UNLOCK_ENDPOINT = f"{API_BASE_URL}/v3/lock/unlock"
 LOCK_ENDPOINT = f"{API_BASE_URL}/v3/lock/lock"
 LOCK_HISTORY_ENDPOINT = f"{API_BASE_URL}/v3/lockRecord/list"
+GATEWAY_BUSY_CODE = -3003  # Response code/errcode when a lock's gateway is busy
+
+# Retries (shared by all cloud requests): capped exponential backoff with jitter
+RETRY_BASE_DELAY = 1.0  # Seconds before the first retry; doubles per attempt
+RETRY_GATEWAY_BUSY_DELAY = 2.0  # Seconds before the first retry after a busy gateway (-3003)
+RETRY_MAX_DELAY = 30.0  # Cap on any single retry delay
+RETRY_DEFAULT_ATTEMPTS = 3  # Attempts for endpoints not listed in RETRY_ATTEMPTS
+RETRY_ATTEMPTS = {  # Attempts per endpoint (1 = no retry)
+    KEYLIST_ENDPOINT: 3,
+    LOCK_DETAIL_ENDPOINT: 3,
+    QUERY_STATE_ENDPOINT: 3,
+    LOCK_ENDPOINT: LOCK_REQUEST_RETRIES,
+    UNLOCK_ENDPOINT: LOCK_REQUEST_RETRIES,
+    LOCK_HISTORY_ENDPOINT: 3,
+    TOKEN_ENDPOINT: 1,  # The token manager has its own retry loop
+    REFRESH_ENDPOINT: 1,
+}
+
+# Timeouts (seconds)
+DEFAULT_REQUEST_TIMEOUT = 15  # Per request, for endpoints not listed in REQUEST_TIMEOUTS
+REQUEST_TIMEOUTS = {
+    KEYLIST_ENDPOINT: 20,
+    LOCK_DETAIL_ENDPOINT: 15,
+    QUERY_STATE_ENDPOINT: 10,
+    LOCK_ENDPOINT: 20,  # Commands wait for the gateway to reach the lock
+    UNLOCK_ENDPOINT: 20,
+    LOCK_HISTORY_ENDPOINT: 20,
+}
+POLL_CYCLE_DEADLINES = {  # Max duration of one scheduled poll run; unfinished locks are cancelled and marked stale
+    "state": 45,
+    "details": 120,
+    "history": 600,
+}
+POLL_LOCK_DEADLINES = {  # Max time one lock may hold a poll slot; kept below each endpoint's retry budget
+    "state": 20,  # 3 x 10s timeouts plus backoff
+    "details": 30,  # 3 x 15s timeouts plus backoff
+    "history": 120,  # Several catch-up pages
+}
 
 # Mapping of record types to human-readable names
 # This is used for displaying history records in a user-friendly way
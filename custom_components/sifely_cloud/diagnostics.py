@@ -5,11 +5,12 @@ from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.components.diagnostics import async_redact_data
 
-from .const import DOMAIN, VERSION, CONF_APX_NUM_LOCKS, CONF_HISTORY_ENTRIES, DETAILS_UPDATE_INTERVAL, \
+from .const import DOMAIN, VERSION, CONF_HISTORY_ENTRIES, DETAILS_UPDATE_INTERVAL, \
     STATE_QUERY_INTERVAL, HISTORY_INTERVAL, HISTORY_DISPLAY_LIMIT, LOCK_REQUEST_RETRIES, TOKEN_REFRESH_BUFFER_MINUTES, \
     TOKEN_401s_BEFORE_REAUTH, TOKEN_401s_BEFORE_ALERT, API_BASE_URL, TOKEN_ENDPOINT, REFRESH_ENDPOINT, KEYLIST_ENDPOINT, \
     LOCK_DETAIL_ENDPOINT, QUERY_STATE_ENDPOINT, UNLOCK_ENDPOINT, LOCK_ENDPOINT, LOCK_HISTORY_ENDPOINT, \
-    HISTORY_RECORD_TYPES, VALID_ENTITY_CATEGORIES
+    HISTORY_RECORD_TYPES, VALID_ENTITY_CATEGORIES, CONF_POLL_CONCURRENCY, DEFAULT_POLL_CONCURRENCY, \
+    LOCK_LIST_PAGE_SIZE, HISTORY_PAGE_SIZE, CONF_BACKFILL_DAYS, DEFAULT_BACKFILL_DAYS
 
 
 # Fields that should not appear in diagnostics
@@ -66,16 +67,36 @@ async def async_get_config_entry_diagnostics(
         "history_folder": getattr(coordinator, "history_path", "not set"),
         "update_interval": getattr(coordinator, "update_interval", "unknown"),
         "last_updated": getattr(coordinator, "last_updated", "unknown"),
+        "setup_timings": getattr(coordinator, "setup_timings", {}),
+        "metrics": getattr(coordinator, "metrics", {}),
+        "history_cache": coordinator.history_cache_info(),
+        "backfill": coordinator.backfill.status(),
+        "scheduler": coordinator.scheduler.status(),
+        "api": coordinator.api.stats(),
+        "restored_state_locks": sorted(getattr(coordinator, "restored_state", set())),
+        "restored_details_locks": sorted(getattr(coordinator, "restored_details", set())),
+        "optimistic_state": getattr(coordinator, "optimistic_state", {}),
+        "stale_locks": {job: sorted(locks) for job, locks in coordinator.stale_locks.items()},
+        "token_status": {
+            "token_expiry": str(coordinator.token_manager.token_expiry),
+            "auth_failed": coordinator.token_manager.auth_failed,
+            "refresh_failures": coordinator.token_manager.refresh_failures,
+            "last_refresh_error": coordinator.token_manager.last_refresh_error,
+            "startup_timings": coordinator.token_manager.startup_timings,
+        },
 
     "constants": {
         "DOMAIN": DOMAIN,
-        "CONF_APX_NUM_LOCKS": entry.options.get(CONF_APX_NUM_LOCKS, "not set"),
         "CONF_HISTORY_ENTRIES": entry.options.get(CONF_HISTORY_ENTRIES, "not set"),
+        "CONF_POLL_CONCURRENCY": entry.options.get(CONF_POLL_CONCURRENCY, DEFAULT_POLL_CONCURRENCY),
+        "CONF_BACKFILL_DAYS": entry.options.get(CONF_BACKFILL_DAYS, DEFAULT_BACKFILL_DAYS),
         "VERSION": VERSION,
         "DETAILS_UPDATE_INTERVAL": DETAILS_UPDATE_INTERVAL,
         "STATE_QUERY_INTERVAL": STATE_QUERY_INTERVAL,
         "HISTORY_INTERVAL": HISTORY_INTERVAL,
         "HISTORY_DISPLAY_LIMIT": HISTORY_DISPLAY_LIMIT,
+        "HISTORY_PAGE_SIZE": HISTORY_PAGE_SIZE,
+        "LOCK_LIST_PAGE_SIZE": LOCK_LIST_PAGE_SIZE,
         "LOCK_REQUEST_RETRIES": LOCK_REQUEST_RETRIES,
         "TOKEN_REFRESH_BUFFER_MINUTES": TOKEN_REFRESH_BUFFER_MINUTES,
         "TOKEN_401s_BEFORE_REAUTH": TOKEN_401s_BEFORE_REAUTH,
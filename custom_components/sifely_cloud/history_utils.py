@@ -1,91 +1,408 @@
+import asyncio
 import os
 import csv
+import json
+import bisect
+import heapq
+import logging
+import time
+from collections import deque
+from itertools import islice
 from datetime import datetime, timezone
 
-from .const import CONF_HISTORY_ENTRIES, HISTORY_RECORD_TYPES
+from homeassistant.helpers.update_coordinator import UpdateFailed
+
+from .const import (
+    CONF_HISTORY_ENTRIES,
+    HISTORY_RECORD_TYPES,
+    HISTORY_MAX_RECORDS,
+    HISTORY_COMPACT_SLACK,
+    HISTORY_SYNC_OVERLAP_SECONDS,
+    HISTORY_INDEX_PRUNE_SIZE,
+)
+
+_LOGGER = logging.getLogger(__name__)
 
 HISTORY_FOLDER = "history"
+HISTORY_FIELDS = ["recordId", "lockDate", "username", "recordType", "success", "timestamp"]
+
+
+def get_legacy_history_path(lock_id: int) -> str:
+    """Return the CSV path used by older versions, inside the component's folder (wiped on updates)."""
+    return os.path.join(os.path.dirname(__file__), HISTORY_FOLDER, f"history_{lock_id}.csv")
+
+
+def format_history_row(entry: dict) -> dict:
+    """Convert a raw cloud history record into a stored history row."""
+    ts = entry.get("lockDate")
+    dt = datetime.fromtimestamp(ts / 1000, tz=timezone.utc).astimezone()
+    formatted_time = dt.strftime("%Y-%m-%d %H:%M:%S")
+
+    record_type_code = entry.get("recordType")
+    record_type = HISTORY_RECORD_TYPES.get(record_type_code, f"{record_type_code}")
+    raw_username = entry.get("username", "Unknown")
+
+    if isinstance(raw_username, str) and "_" in raw_username:
+        username = raw_username.split("_")[0] + "_"
+    else:
+        username = raw_username
+
+    success = "Success" if entry.get("success", -1) == 1 else "Failed"
 
+    return {
+        "recordId": str(entry.get("recordId")),
+        "lockDate": formatted_time,
+        "username": username,
+        "recordType": record_type,
+        "success": success,
+        "timestamp": int(ts),
+    }
 
-def get_history_path(lock_id: int) -> str:
-    """Return full CSV path for the given lock_id inside the component's folder."""
-    base_dir = os.path.dirname(__file__)
-    history_dir = os.path.join(base_dir, HISTORY_FOLDER)
-    os.makedirs(history_dir, exist_ok=True)  # Make sure it exists
 
-    return os.path.join(history_dir, f"history_{lock_id}.csv")
+def history_event_data(lock_id: int, alias: str | None, row: dict) -> dict:
+    """Build the bus event payload for one stored history row."""
+    return {
+        "lock_id": lock_id,
+        "lock_alias": alias,
+        "record_id": row["recordId"],
+        "lock_date": datetime.fromtimestamp(row["timestamp"] / 1000, tz=timezone.utc).isoformat(),
+        "username": row["username"],
+        "method": row["recordType"],
+        "success": row["success"] == "Success",
+    }
 
-def read_csv(path: str):
-    """Read and parse existing CSV history file."""
-    seen_ids = set()
-    existing_rows = []
 
+def _row_sort_key(row: dict) -> tuple[int, int]:
+    """Order rows numerically by lock time, then record id."""
+    return int(row.get("timestamp") or 0), int(row.get("recordId") or 0)
+
+
+def _parse_stored_row(row: dict) -> dict:
+    """Normalize a row read back from disk (legacy rows have no timestamp column)."""
+    if not row.get("timestamp"):
+        try:
+            local = datetime.strptime(row["lockDate"], "%Y-%m-%d %H:%M:%S").astimezone()
+            row["timestamp"] = int(local.timestamp() * 1000)
+        except (KeyError, TypeError, ValueError):
+            row["timestamp"] = 0
+    row["timestamp"] = int(row["timestamp"])
+    return row
+
+
+def read_csv(path: str) -> list[dict]:
+    """Read and parse an existing CSV history file."""
+    rows = []
     if os.path.isfile(path):
         with open(path, newline="", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                seen_ids.add(row["recordId"])
-                existing_rows.append(row)
-
-    return seen_ids, existing_rows
+            for row in csv.DictReader(csvfile):
+                if row.get("recordId"):
+                    rows.append(_parse_stored_row(row))
+    return rows
 
 
 def write_csv(path: str, rows: list[dict]):
-    """Write lock history entries to CSV."""
-    with open(path, "w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=["recordId", "lockDate", "username", "recordType", "success"])
+    """Write lock history entries to CSV, replacing the file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=HISTORY_FIELDS, extrasaction="ignore")
         writer.writeheader()
         writer.writerows(rows)
+    os.replace(tmp_path, path)
+
 
+def append_csv(path: str, rows: list[dict]):
+    """Append lock history entries to CSV, writing the header for a new file."""
+    new_file = not os.path.isfile(path)
+    with open(path, "a", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=HISTORY_FIELDS, extrasaction="ignore")
+        if new_file:
+            writer.writeheader()
+        writer.writerows(rows)
 
-async def fetch_and_update_lock_history(coordinator, lock_id: int):
-    """Fetch and persist new lock history entries for a given lock."""
-    new_entries = await coordinator.async_query_lock_history(lock_id)
-    if not new_entries:
-        return []
-
-    path = get_history_path(lock_id)
-    os.makedirs(HISTORY_FOLDER, exist_ok=True)
-
-    seen_ids, existing_rows = await coordinator.hass.async_add_executor_job(read_csv, path)
-
-    fresh_rows = []
-    for row in new_entries:
-        record_id = str(row.get("recordId"))
-        if record_id in seen_ids:
-            continue
-
-        ts = row.get("lockDate")
-        dt = datetime.fromtimestamp(ts / 1000, tz=timezone.utc).astimezone()
-        formatted_time = dt.strftime("%Y-%m-%d %H:%M:%S")
-
-        record_type_code = row.get("recordType")
-        record_type = HISTORY_RECORD_TYPES.get(record_type_code, f"{record_type_code}")
-        raw_username = row.get("username", "Unknown")
-        
-        if isinstance(raw_username, str) and "_" in raw_username:
-            username = raw_username.split("_")[0] + "_"
-        else:
-            username = raw_username
-            
-        success = "Success" if row.get("success", -1) == 1 else "Failed"
-
-        fresh_rows.append({
-            "recordId": record_id,
-            "lockDate": formatted_time,
-            "username": username,
-            "recordType": record_type,
-            "success": success,
-        })
 
-    if fresh_rows:
-        existing_rows.extend(fresh_rows)
-        existing_rows = sorted(existing_rows, key=lambda r: r["recordId"], reverse=True)
+def append_export_chunk(path: str, rows: list[dict], file_format: str):
+    """Append one chunk of formatted rows to an export file (CSV or JSON Lines)."""
+    new_file = not os.path.isfile(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", newline="", encoding="utf-8") as export_file:
+        if file_format == "jsonl":
+            for row in rows:
+                export_file.write(json.dumps(row, ensure_ascii=False) + "\n")
+            return
+
+        writer = csv.DictWriter(export_file, fieldnames=HISTORY_FIELDS, extrasaction="ignore")
+        if new_file:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+async def export_lock_history(coordinator, lock_id: int, start_date: int, end_date: int,
+                              path: str, file_format: str) -> int:
+    """Stream a lock's cloud history for a date range (ms) to a file, one page at a time.
+
+    Each page is formatted and appended in the executor as it arrives, so memory stays
+    bounded by a single page however long the range is. Returns the number of records.
+    """
+    count = 0
+    async for records in coordinator.async_iter_history_pages(lock_id, start_date, end_date):
+        rows = [format_history_row(entry) for entry in records if entry.get("lockDate") is not None]
+        await coordinator.hass.async_add_executor_job(append_export_chunk, path, rows, file_format)
+        count += len(rows)
+    return count
+
+
+class HistoryRingBuffer:
+    """Fixed-capacity history rows kept in ascending (lockDate, recordId) order.
+
+    New records are normally the newest, so a merge is an O(1) append per record that
+    evicts the oldest row once full; out-of-order records fall back to a bisect insert.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._rows: deque[dict] = deque(maxlen=capacity)
+        self._keys: deque[tuple[int, int]] = deque(maxlen=capacity)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def newest_key(self) -> tuple[int, int] | None:
+        return self._keys[-1] if self._keys else None
+
+    def add(self, row: dict):
+        key = _row_sort_key(row)
+        if not self._keys or key >= self._keys[-1]:
+            self._keys.append(key)
+            self._rows.append(row)
+            return
+
+        full = len(self._keys) == self.capacity
+        if full and key <= self._keys[0]:
+            return  # Older than everything retained
+
+        index = bisect.bisect_right(self._keys, key)
+        if full:
+            self._keys.popleft()
+            self._rows.popleft()
+            index -= 1
+        self._keys.insert(index, key)
+        self._rows.insert(index, row)
+
+    def latest(self, limit: int) -> list[dict]:
+        """Return up to `limit` newest rows, newest first."""
+        return list(islice(reversed(self._rows), limit))
+
+
+class LockHistoryStore:
+    """Append-only per-lock history files with an in-memory recordId index.
 
-        limit = coordinator.config_entry.options.get(CONF_HISTORY_ENTRIES, 20)
-        trimmed = existing_rows[:limit]
+    Each lock's file is read the first time the lock is used, to build its index, the
+    newest-record watermark and the recent rows shown by the sensor. After that each
+    update only appends the new rows; a file is rewritten (compacted) only once it
+    grows past the size limit. Compaction keeps the newest max_records rows plus every
+    row within retain_days (the backfill horizon), so backfilled history is never
+    trimmed away. The index only holds ids a sync can fetch again (the overlap window
+    and any open sync gap), so its size does not grow with the stored history.
+    """
 
-        await coordinator.hass.async_add_executor_job(write_csv, path, trimmed)
-        return trimmed
+    def __init__(self, base_dir: str, max_records: int = HISTORY_MAX_RECORDS, retain_days: int = 0):
+        self.base_dir = base_dir
+        self.max_records = max_records
+        self.retain_days = retain_days
+        self._compact_at: dict[int, int] = {}
+        self._ids: dict[int, dict[str, int]] = {}  # recordId -> timestamp (ms)
+        self._prune_at: dict[int, int] = {}
+        self._recent: dict[int, HistoryRingBuffer] = {}
+        self._row_counts: dict[int, int] = {}
+        self._pending: dict[int, list[dict]] = {}
+        self.watermarks: dict[int, tuple[int, int]] = {}
+        self.sync_gaps: dict[int, tuple[int, int]] = {}
+        self.oldest: dict[int, int] = {}
+        self._loaded: set[int] = set()
+        self._flush_lock = asyncio.Lock()
+
+    def get_path(self, lock_id: int) -> str:
+        """Return the CSV path for the given lock_id."""
+        return os.path.join(self.base_dir, f"history_{lock_id}.csv")
+
+    def is_loaded(self, lock_id: int) -> bool:
+        """Return True once the lock's file has been indexed."""
+        return lock_id in self._loaded
+
+    def load(self, lock_ids: list[int], recent_limit: int):
+        """Index the files of locks not loaded yet (runs in the executor)."""
+        os.makedirs(self.base_dir, exist_ok=True)
+
+        for lock_id in lock_ids:
+            if lock_id in self._loaded:
+                continue
+            path = self.get_path(lock_id)
+            legacy_path = get_legacy_history_path(lock_id)
+
+            if not os.path.isfile(path) and os.path.isfile(legacy_path):
+                _LOGGER.info("📦 Migrating history for %s from %s", lock_id, legacy_path)
+                write_csv(path, read_csv(legacy_path))
+
+            self._index_rows(lock_id, read_csv(path), recent_limit)
+            self._loaded.add(lock_id)
+
+    def _index_rows(self, lock_id: int, rows: list[dict], recent_limit: int):
+        self._row_counts[lock_id] = len(rows)
+        if rows:
+            self.oldest[lock_id] = min(row["timestamp"] for row in rows)
+
+        buffer = HistoryRingBuffer(recent_limit)
+        for row in reversed(heapq.nlargest(recent_limit, rows, key=_row_sort_key)):
+            buffer.add(row)
+        self._recent[lock_id] = buffer
+        if buffer.newest_key:
+            self.watermarks[lock_id] = buffer.newest_key
+
+        floor = self._dedupe_floor(lock_id)
+        self._ids[lock_id] = {row["recordId"]: row["timestamp"] for row in rows if row["timestamp"] >= floor}
+
+    def _dedupe_floor(self, lock_id: int) -> int:
+        """Return the oldest timestamp (ms) a sync may fetch again for the lock."""
+        watermark = self.watermarks.get(lock_id)
+        if not watermark:
+            return 0
+        floor = watermark[0] - HISTORY_SYNC_OVERLAP_SECONDS * 1000
+        gap = self.sync_gaps.get(lock_id)
+        return min(floor, gap[0]) if gap else floor
+
+    def _prune_ids(self, lock_id: int):
+        """Drop indexed ids older than the dedupe floor once the index has grown enough."""
+        seen_ids = self._ids[lock_id]
+        if len(seen_ids) <= self._prune_at.get(lock_id, HISTORY_INDEX_PRUNE_SIZE):
+            return
+        floor = self._dedupe_floor(lock_id)
+        self._ids[lock_id] = {record_id: ts for record_id, ts in seen_ids.items() if ts >= floor}
+        self._prune_at[lock_id] = max(HISTORY_INDEX_PRUNE_SIZE, 2 * len(self._ids[lock_id]))
+
+    def merge(self, lock_id: int, entries: list[dict], recent_limit: int) -> list[dict]:
+        """Index new cloud records and return the rows not seen before."""
+        seen_ids = self._ids.setdefault(lock_id, {})
+        buffer = self._recent.setdefault(lock_id, HistoryRingBuffer(recent_limit))
+
+        fresh_rows = []
+        for entry in entries:
+            if entry.get("lockDate") is None or str(entry.get("recordId")) in seen_ids:
+                continue
+            row = format_history_row(entry)
+            seen_ids[row["recordId"]] = row["timestamp"]
+            buffer.add(row)
+            fresh_rows.append(row)
+            if row["timestamp"] < self.oldest.get(lock_id, row["timestamp"] + 1):
+                self.oldest[lock_id] = row["timestamp"]
+
+        if buffer.newest_key and buffer.newest_key > self.watermarks.get(lock_id, (0, 0)):
+            self.watermarks[lock_id] = buffer.newest_key
+
+        self._prune_ids(lock_id)
+        return fresh_rows
+
+    def recent(self, lock_id: int, limit: int) -> list[dict]:
+        """Return up to `limit` newest rows for the lock, newest first."""
+        buffer = self._recent.get(lock_id)
+        return buffer.latest(limit) if buffer else []
+
+    def record_count(self, lock_id: int) -> int:
+        """Return the number of records stored (or queued) for the lock."""
+        return self._row_counts.get(lock_id, 0) + len(self._pending.get(lock_id, []))
+
+    @property
+    def pending(self) -> dict[int, list[dict]]:
+        """Rows queued but not yet written, by lock."""
+        return self._pending
+
+    def queue(self, lock_id: int, rows: list[dict]):
+        """Queue new rows for the next flush."""
+        self._pending.setdefault(lock_id, []).extend(rows)
+
+    async def async_flush(self, hass):
+        """Write all queued rows for every lock in a single executor job.
+
+        Flushes are serialized, so appends and compaction never touch a file from two
+        executor threads at once. Rows queued while a flush runs wait for the next one.
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            await hass.async_add_executor_job(self._write_pending, pending)
+
+    def _write_pending(self, pending: dict[int, list[dict]]):
+        """Append queued rows to each lock's file (runs in the executor)."""
+        os.makedirs(self.base_dir, exist_ok=True)
+        for lock_id, rows in pending.items():
+            try:
+                self._append(lock_id, rows)
+            except OSError as e:
+                _LOGGER.warning("⚠️ Failed writing history for %s: %s", lock_id, e)
+
+    def _append(self, lock_id: int, rows: list[dict]):
+        """Append rows to the lock's file, compacting it once it crosses the limit."""
+        path = self.get_path(lock_id)
+        append_csv(path, rows)
+
+        count = self._row_counts.get(lock_id, 0) + len(rows)
+        self._row_counts[lock_id] = count
+        if count <= self._compact_at.get(lock_id, self.max_records + HISTORY_COMPACT_SLACK):
+            return
+
+        retain_since = int((time.time() - self.retain_days * 86400) * 1000) if self.retain_days > 0 else None
+        rows = sorted(read_csv(path), key=_row_sort_key, reverse=True)
+        kept = [
+            row for index, row in enumerate(rows)
+            if index < self.max_records or (retain_since is not None and row["timestamp"] >= retain_since)
+        ]
+        write_csv(path, kept)
+        self._row_counts[lock_id] = len(kept)
+        # Rows inside the horizon cannot be dropped; wait for another slack's worth before retrying
+        self._compact_at[lock_id] = max(len(kept), self.max_records) + HISTORY_COMPACT_SLACK
+        _LOGGER.debug("🗜️ Compacted history for %s to %d records", lock_id, len(kept))
+
+
+async def fetch_and_update_lock_history(coordinator, lock_id: int, flush: bool = True, wait_busy: bool = True) -> list[dict]:
+    """Fetch and persist lock history entries recorded since the lock's watermark.
+
+    A catch-up cut short by the page cap fetches the newest records first, so the
+    records between the old watermark and the oldest one fetched are kept as a sync
+    gap and fetched before anything newer on the next call.
+
+    Returns only the rows not seen before, oldest first. With flush=False the new rows
+    are only queued, so a caller updating many locks can write them all with one
+    store.async_flush(). With wait_busy=False a busy gateway fails the fetch instead of
+    being waited out. Raises UpdateFailed if the fetch failed.
+    """
+    store = coordinator.history_store
+    limit = coordinator.config_entry.options.get(CONF_HISTORY_ENTRIES, 20)
+
+    gap = store.sync_gaps.get(lock_id)
+    if gap:
+        since, until = gap
+    else:
+        watermark = store.watermarks.get(lock_id)
+        since = max(watermark[0] - HISTORY_SYNC_OVERLAP_SECONDS * 1000, 0) if watermark else None
+        until = None
+
+    result = await coordinator.async_query_new_lock_history(lock_id, since, wait_busy, until)
+    if result is None:
+        raise UpdateFailed(f"History fetch failed for lock {lock_id}")
+
+    new_entries, caught_up = result
+    dated = [entry["lockDate"] for entry in new_entries if entry.get("lockDate") is not None]
+    if caught_up or not dated:
+        store.sync_gaps.pop(lock_id, None)
+    else:
+        # The oldest record fetched is included again, so records sharing its lockDate are not skipped
+        store.sync_gaps[lock_id] = (since, min(dated))
+
+    fresh_rows = store.merge(lock_id, new_entries, limit)
+    if fresh_rows:
+        store.queue(lock_id, fresh_rows)
+        if flush:
+            await store.async_flush(coordinator.hass)
 
-    return existing_rows[:coordinator.config_entry.options.get(CONF_HISTORY_ENTRIES, 20)]
+    return sorted(fresh_rows, key=_row_sort_key)
@@ -47,7 +47,9 @@ class SifelySmartLock(LockEntity):
         if not self.lock_id:
             return None
 
-        state = self.coordinator.open_state_data.get(self.lock_id)
+        state = self.coordinator.optimistic_state.get(
+            self.lock_id, self.coordinator.open_state_data.get(self.lock_id)
+        )
         # Sifely: 0 = locked, 1 = unlocked
         return True if state == 0 else False if state == 1 else None
 
@@ -58,9 +60,7 @@ class SifelySmartLock(LockEntity):
             return
 
         _LOGGER.info("🔒 Lock command issued for %s", self.alias)
-        await self.coordinator.async_send_lock_command(self.lock_id, lock=True)
-        await self.coordinator.async_query_open_state()
-        self.async_write_ha_state()
+        await self._async_send_command(lock=True)
 
     async def async_unlock(self, **kwargs):
         """Send unlock command to the device."""
@@ -69,14 +69,42 @@ class SifelySmartLock(LockEntity):
             return
 
         _LOGGER.info("🔓 Unlock command issued for %s", self.alias)
-        await self.coordinator.async_send_lock_command(self.lock_id, lock=False)
-        await self.coordinator.async_query_open_state()
+        await self._async_send_command(lock=False)
+
+    async def _async_send_command(self, lock: bool):
+        """Show locking/unlocking while the command is sent, then the resulting state.
+
+        In optimistic mode the expected state is shown as soon as the cloud accepts the
+        command and confirmed in the background; otherwise the entity stays
+        locking/unlocking until the lock reports the new state.
+        """
+        self._attr_is_locking = lock
+        self._attr_is_unlocking = not lock
         self.async_write_ha_state()
 
+        try:
+            if await self.coordinator.async_send_lock_command(self.lock_id, lock=lock):
+                if self.coordinator.optimistic:
+                    self.coordinator.async_start_reconciliation(self.lock_id, locked=lock)
+                else:
+                    await self.coordinator.async_confirm_lock_state(self.lock_id, locked=lock)
+        finally:
+            self._attr_is_locking = False
+            self._attr_is_unlocking = False
+            self.async_write_ha_state()
+
     @property
     def available(self):
         return self.lock_id is not None and self.lock_id in self.coordinator.open_state_data
 
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Flag a restored or optimistic (not yet confirmed) state, with when it was last seen."""
+        attrs = self.coordinator.restored_attributes(self.lock_id, "state")
+        if self.lock_id in self.coordinator.optimistic_state:
+            attrs = {**attrs, "unconfirmed": True}
+        return attrs
+
     async def async_update(self):
         await self.coordinator.async_request_refresh()
 
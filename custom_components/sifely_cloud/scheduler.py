@@ -0,0 +1,200 @@
+"""Adaptive, staggered per-lock polling for Sifely Cloud."""
+
+import asyncio
+import logging
+import math
+import random
+import time
+
+from .const import (
+    STATE_QUERY_INTERVAL,
+    DETAILS_UPDATE_INTERVAL,
+    HISTORY_INTERVAL,
+    STATE_POLL_ACTIVE_SECONDS,
+    STATE_POLL_BACKOFF_FACTOR,
+    POLL_JITTER_FRACTION,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+JOB_STATE = "state"
+JOB_DETAILS = "details"
+JOB_HISTORY = "history"
+JOBS = (JOB_STATE, JOB_DETAILS, JOB_HISTORY)
+
+# Shift each job by a fraction of a lock's slot so one lock's jobs never fire together
+JOB_PHASE = {JOB_STATE: 0.0, JOB_DETAILS: 1 / 3, JOB_HISTORY: 2 / 3}
+
+
+class SifelyPollScheduler:
+    """Poll each lock's state, details and history in anchored, staggered slots; state adapts between floor and ceiling."""
+
+    def __init__(self, coordinator, floor: int, ceiling: int):
+        self.coordinator = coordinator
+        self.floor = floor
+        self.ceiling = max(ceiling, floor)
+        self._interval: dict[int, float] = {}
+        self._active_until: dict[int, float] = {}
+        self._next_due: dict[str, dict[int, float]] = {job: {} for job in JOBS}
+        self._slot: dict[str, dict[int, float]] = {job: {} for job in JOBS}
+        self._in_flight: dict[str, set[int]] = {job: set() for job in JOBS}
+        self._overran: dict[str, set[int]] = {job: set() for job in JOBS}
+        self.polls = {job: 0 for job in JOBS}
+        self.cycles = {
+            job: {"runs": 0, "overruns": 0, "skipped": 0, "last_duration": None, "max_duration": 0.0}
+            for job in JOBS
+        }
+        coordinator.metrics["cycles"] = self.cycles
+
+    def interval(self, lock_id: int) -> float:
+        """Return the lock's current state-poll interval in seconds."""
+        return self._interval.get(lock_id, min(max(STATE_QUERY_INTERVAL, self.floor), self.ceiling))
+
+    def _job_interval(self, job: str, lock_id: int) -> float:
+        if job == JOB_STATE:
+            return self.interval(lock_id)
+        return DETAILS_UPDATE_INTERVAL if job == JOB_DETAILS else HISTORY_INTERVAL
+
+    @staticmethod
+    def _jittered(interval: float) -> float:
+        return interval * (1 + random.uniform(-POLL_JITTER_FRACTION, POLL_JITTER_FRACTION))
+
+    def _reschedule(self, job: str, lock_id: int, interval: float, now: float):
+        """Move a polled lock to its next slot and schedule it jittered around that slot."""
+        slots = self._slot[job]
+        slot = slots.get(lock_id, now)
+        if slot <= now + interval / 2:
+            # This poll served the slot (or a late one); skip to the first slot well after now
+            slot += (math.floor((now + interval / 2 - slot) / interval) + 1) * interval
+            slots[lock_id] = slot
+        self._next_due[job][lock_id] = max(now, slot + interval * random.uniform(-POLL_JITTER_FRACTION, POLL_JITTER_FRACTION))
+
+    def _phase(self, job: str, lock_id: int) -> float:
+        """Return the lock's stable offset within an interval, as a fraction in [0, 1)."""
+        lock_ids = sorted(lock["lockId"] for lock in self.coordinator.lock_list if lock.get("lockId"))
+        if lock_id not in lock_ids:
+            return random.random()
+        return ((lock_ids.index(lock_id) + JOB_PHASE[job]) / len(lock_ids)) % 1
+
+    def start(self):
+        """Spread the first poll of every job across its interval (called after the initial load)."""
+        for job in JOBS:
+            self._next_due[job].clear()
+            self._slot[job].clear()
+
+    def mark_active(self, lock_id: int):
+        """Poll a lock at the floor interval for a while, starting within one floor period."""
+        now = time.monotonic()
+        self._active_until[lock_id] = now + STATE_POLL_ACTIVE_SECONDS
+        self._interval[lock_id] = self.floor
+        for times in (self._next_due[JOB_STATE], self._slot[JOB_STATE]):
+            times[lock_id] = min(times.get(lock_id, now + self.floor), now + self.floor)
+
+    def record_state(self, lock_id: int, changed: bool):
+        """Adapt a lock's interval after a successful state poll."""
+        now = time.monotonic()
+        if changed:
+            self._active_until[lock_id] = now + STATE_POLL_ACTIVE_SECONDS
+
+        if now < self._active_until.get(lock_id, 0):
+            interval = self.floor
+        else:
+            interval = min(self.ceiling, max(self.floor, self.interval(lock_id) * STATE_POLL_BACKOFF_FACTOR))
+
+        self._interval[lock_id] = interval
+        self._reschedule(JOB_STATE, lock_id, interval, now)
+
+    def due_locks(self, job: str, now: float) -> list[int]:
+        """Return the locks whose poll for job is due."""
+        due = self._next_due[job]
+        locks = []
+        for lock in self.coordinator.lock_list:
+            lock_id = lock.get("lockId")
+            if not lock_id:
+                continue
+            if lock_id not in due:
+                due[lock_id] = now + self._phase(job, lock_id) * self._job_interval(job, lock_id)
+                self._slot[job][lock_id] = due[lock_id]
+            if due[lock_id] <= now:
+                locks.append(lock_id)
+        return locks
+
+    def _runner(self, job: str):
+        if job == JOB_STATE:
+            return self.coordinator.async_query_open_state
+        if job == JOB_DETAILS:
+            return self.coordinator.async_query_lock_details
+        return self.coordinator.async_update_all_history
+
+    async def _async_run_job(self, job: str, now: float):
+        counters = self.cycles[job]
+        in_flight = self._in_flight[job]
+        due = self.due_locks(job, now)
+        waiting = [lock_id for lock_id in due if lock_id in in_flight]
+        due = [lock_id for lock_id in due if lock_id not in in_flight]
+
+        if waiting:
+            counters["skipped"] += 1
+            counters["overruns"] += len(set(waiting) - self._overran[job])
+            self._overran[job].update(waiting)
+            _LOGGER.debug("⏩ %s poll still running for %s; polling them again once it finishes", job, waiting)
+        if not due:
+            return
+
+        for lock_id in due:
+            if job == JOB_STATE:
+                # record_state moves the slot on success; a failed poll retries one interval later
+                self._next_due[job][lock_id] = now + self._jittered(self.interval(lock_id))
+            else:
+                self._reschedule(job, lock_id, self._job_interval(job, lock_id), now)
+
+        _LOGGER.debug("⏱️ Scheduled %s poll for %d of %d locks", job, len(due), len(self.coordinator.lock_list))
+        in_flight.update(due)
+        started = time.monotonic()
+        try:
+            self.polls[job] += len(due)
+            counters["runs"] += 1
+            await self._runner(job)(due)
+            self._defer_busy(job, due)
+        finally:
+            in_flight.difference_update(due)
+            self._overran[job].difference_update(due)
+            duration = round(time.monotonic() - started, 3)
+            counters["last_duration"] = duration
+            counters["max_duration"] = max(counters["max_duration"], duration)
+
+    def _defer_busy(self, job: str, lock_ids: list[int]):
+        """Retry locks whose gateway was busy as soon as the busy period ends."""
+        now = time.monotonic()
+        for lock_id in lock_ids:
+            busy = self.coordinator.api.busy_remaining(lock_id)
+            if busy > 0:
+                self._next_due[job][lock_id] = min(self._next_due[job].get(lock_id, now + busy), now + busy)
+
+    async def async_tick(self, now=None):
+        """Run every job whose poll is due for at least one lock."""
+        if not self.coordinator.initial_load_done:
+            return  # The initial load polls every lock; start() then seeds the timeline
+
+        started = time.monotonic()
+        await asyncio.gather(*(self._async_run_job(job, started) for job in JOBS))
+
+    def status(self) -> dict:
+        """Return per-lock intervals, due times and poll counts for diagnostics."""
+        now = time.monotonic()
+        return {
+            "floor": self.floor,
+            "ceiling": self.ceiling,
+            "polls": dict(self.polls),
+            "locks": {
+                lock_id: {
+                    "interval": round(self.interval(lock_id), 1),
+                    "active": now < self._active_until.get(lock_id, 0),
+                    **{
+                        f"{job}_due_in": round(self._next_due[job][lock_id] - now, 1)
+                        for job in JOBS if lock_id in self._next_due[job]
+                    },
+                }
+                for lock_id in self._next_due[JOB_STATE]
+            },
+        }
@@ -5,9 +5,8 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers.entity import EntityCategory
-from datetime import datetime, timezone
 
-from .const import DOMAIN, ENTITY_PREFIX, HISTORY_DISPLAY_LIMIT, HISTORY_RECORD_TYPES
+from .const import DOMAIN, ENTITY_PREFIX, CONF_HISTORY_ENTRIES, HISTORY_RECORD_TYPES
 from .device import async_register_lock_device
 
 _LOGGER = logging.getLogger(__name__)
@@ -65,6 +64,11 @@ class SifelyBatterySensor(CoordinatorEntity, SensorEntity):
             "electricQuantity" in self.coordinator.details_data[self.lock_id]
         )
 
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Flag a last-known battery level restored from the snapshot."""
+        return self.coordinator.restored_attributes(self.lock_id, "details")
+
 
 class SifelyLockHistorySensor(CoordinatorEntity, SensorEntity):
     """Sensor to display recent lock activity as text."""
@@ -85,74 +89,51 @@ class SifelyLockHistorySensor(CoordinatorEntity, SensorEntity):
         self._attr_extra_state_attributes = {}
         self._attr_device_info = async_register_lock_device(lock_data)
 
-        if not hasattr(coordinator, "update_history_sensor"):
-            coordinator.update_history_sensor = self._external_update
-
         self._latest_entries: list[dict] = []
 
-    async def async_update(self):
-        history = await self.coordinator.async_query_lock_history(self.lock_id)
-        if not history:
-            self._attr_native_value = "No recent activity"
-            self._attr_extra_state_attributes = {}
-            return
-
-        lines = []
-        attr_map = {}
-
-        for i, entry in enumerate(history[:HISTORY_DISPLAY_LIMIT]):
-            user = entry.get("username", "Unknown")
-            ts = entry.get("lockDate")
-            record_type = entry.get("recordType", "N/A")
-            success = entry.get("success", -1)
-
-            method = HISTORY_RECORD_TYPES.get(record_type, f"{record_type}")
-            success_text = "✅ Success" if success == 1 else "❌ Failed"
-
-            try:
-                dt = datetime.fromtimestamp(ts / 1000, tz=timezone.utc).astimezone()
-                formatted_time = dt.strftime("%Y-%m-%d %H:%M:%S")
-            except Exception:
-                formatted_time = str(ts)
-
-            line = f"{formatted_time}: {user} via {method} — {success_text}"
-            lines.append(line)
-            attr_map[f"entry_{i+1}"] = line
+    async def async_added_to_hass(self):
+        """Subscribe to this lock's history and show whatever is already cached."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_history_listener(self.lock_id, self._handle_history_update)
+        )
+        self._latest_entries = self.coordinator.history_store.recent(
+            self.lock_id, self.coordinator.config_entry.options.get(CONF_HISTORY_ENTRIES, 20)
+        )
+        self._update_from_entries()
 
-        self._attr_native_value = lines[0] if lines else "No recent activity"
-        self._attr_extra_state_attributes = attr_map
+    async def async_update(self):
+        """Read history through the coordinator cache (no extra cloud call while it is fresh)."""
+        self._latest_entries = await self.coordinator.async_get_lock_history(self.lock_id)
+        self._update_from_entries()
 
-    async def _external_update(self, lock_id, entries):
-        if lock_id != self.lock_id:
-            return
+    def _handle_history_update(self, entries):
         self._latest_entries = entries
         self._update_from_entries()
-        self.async_write_ha_state()
+        if self.hass:
+            self.async_write_ha_state()
 
     def _update_from_entries(self):
+        """Show the latest record plus a small fixed summary (individual records go out as bus events)."""
         if not self._latest_entries:
             self._attr_native_value = "No recent activity"
             self._attr_extra_state_attributes = {}
             return
 
-        attr_map = {}
-        latest_value = None
-
-        for entry in self._latest_entries:
-            timestamp = entry.get("lockDate")
-            username = entry.get("username", "Unknown")
-            record_type = entry.get("recordType", "N/A")
-            success = entry.get("success", "Unknown")
-
-            method = HISTORY_RECORD_TYPES.get(record_type, f"{record_type}")
-            formatted = f"{username} - {method} - {success}"
-
-            attr_map[timestamp] = formatted
-            if latest_value is None:
-                latest_value = formatted
-
-        self._attr_native_value = latest_value
-        self._attr_extra_state_attributes = attr_map
+        latest = self._latest_entries[0]
+        username = latest.get("username", "Unknown")
+        record_type = latest.get("recordType", "N/A")
+        method = HISTORY_RECORD_TYPES.get(record_type, f"{record_type}")
+        success = latest.get("success", "Unknown")
+
+        self._attr_native_value = f"{username} - {method} - {success}"
+        self._attr_extra_state_attributes = {
+            "last_time": latest.get("lockDate"),
+            "last_user": username,
+            "last_method": method,
+            "last_result": success,
+            "recent_count": len(self._latest_entries),
+        }
 
 
 class SifelyCloudErrorSensor(CoordinatorEntity, SensorEntity):
@@ -214,6 +195,8 @@ class SifelyDiagnosticSensor(CoordinatorEntity, SensorEntity):
     def native_value(self) -> str | None:
         """Return a simple status for diagnostics."""
         details = self.coordinator.details_data.get(self.lock_id)
+        if not details and not getattr(self.coordinator, "initial_load_done", True):
+            return "Restoring"
         return "OK" if details else "Unavailable"
 
     @property
@@ -231,6 +214,7 @@ class SifelyDiagnosticSensor(CoordinatorEntity, SensorEntity):
             "is_frozen": details.get("isFrozen", False),
             "passage_mode": details.get("passageMode", False),
             "lock_version": details.get("lockVersion", "N/A"),
+            **self.coordinator.restored_attributes(self.lock_id, "details"),
         }
 
 
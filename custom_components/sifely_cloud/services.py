@@ -0,0 +1,96 @@
+"""Services for Sifely Cloud."""
+
+import logging
+import os
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    SERVICE_EXPORT_HISTORY,
+    EVENT_EXPORT_COMPLETE,
+    HISTORY_EXPORT_DIR,
+)
+from .history_utils import export_lock_history
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_LOCK_ID = "lock_id"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_FORMAT = "format"
+ATTR_DESTINATION = "destination"
+
+EXPORT_HISTORY_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_LOCK_ID): vol.Coerce(int),
+    vol.Optional(ATTR_START): cv.datetime,
+    vol.Optional(ATTR_END): cv.datetime,
+    vol.Optional(ATTR_FORMAT, default="csv"): vol.In(["csv", "jsonl"]),
+    vol.Optional(ATTR_DESTINATION, default="config"): vol.In(["config", "www"]),
+})
+
+
+def _export_dir(hass: HomeAssistant, destination: str) -> str:
+    """Return the export folder; www/ makes files downloadable via /local/sifely_cloud/."""
+    if destination == "www":
+        return hass.config.path("www", DOMAIN)
+    return hass.config.path(HISTORY_EXPORT_DIR)
+
+
+def _to_ms(value, default: int) -> int:
+    """Convert a service datetime (naive means HA local time) to epoch milliseconds."""
+    if value is None:
+        return default
+    return int(dt_util.as_utc(value).timestamp() * 1000)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant):
+    """Register Sifely Cloud services."""
+
+    async def _handle_export_history(call: ServiceCall):
+        coordinator = hass.data.get(DOMAIN, {}).get("coordinator")
+        if coordinator is None:
+            raise HomeAssistantError("Sifely Cloud is not set up")
+
+        lock_ids = [lock["lockId"] for lock in coordinator.lock_list if lock.get("lockId")]
+        if ATTR_LOCK_ID in call.data:
+            if call.data[ATTR_LOCK_ID] not in lock_ids:
+                raise HomeAssistantError(f"Unknown Sifely lock id: {call.data[ATTR_LOCK_ID]}")
+            lock_ids = [call.data[ATTR_LOCK_ID]]
+
+        start_date = _to_ms(call.data.get(ATTR_START), 0)
+        end_date = _to_ms(call.data.get(ATTR_END), int(dt_util.utcnow().timestamp() * 1000))
+        file_format = call.data[ATTR_FORMAT]
+        export_dir = _export_dir(hass, call.data[ATTR_DESTINATION])
+        stamp = dt_util.now().strftime("%Y%m%d-%H%M%S")
+
+        async def _run_export():
+            for lock_id in lock_ids:
+                path = os.path.join(export_dir, f"history_{lock_id}_{stamp}.{file_format}")
+                _LOGGER.info("📤 Exporting history for %s to %s", lock_id, path)
+                try:
+                    count = await export_lock_history(coordinator, lock_id, start_date, end_date, path, file_format)
+                    error = None
+                except Exception as e:
+                    _LOGGER.warning("⚠️ History export for %s failed: %s", lock_id, e)
+                    count, error = None, str(e)
+
+                hass.bus.async_fire(EVENT_EXPORT_COMPLETE, {
+                    "lock_id": lock_id,
+                    "path": path,
+                    "records": count,
+                    "error": error,
+                })
+                if error is None:
+                    _LOGGER.info("✅ Exported %d history records for %s", count, lock_id)
+
+        # Long ranges can take a while; run in the background and report via EVENT_EXPORT_COMPLETE
+        coordinator.config_entry.async_create_background_task(hass, _run_export(), "sifely_cloud_export_history")
+
+    hass.services.async_register(DOMAIN, SERVICE_EXPORT_HISTORY, _handle_export_history, schema=EXPORT_HISTORY_SCHEMA)
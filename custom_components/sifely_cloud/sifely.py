@@ -1,9 +1,11 @@
 # sifely.py (with lock/unlock command support)
 
+import asyncio
 import logging
-import json
+import time
+from functools import partial
 from datetime import datetime, timezone, timedelta
-from .history_utils import fetch_and_update_lock_history
+from .history_utils import LockHistoryStore, fetch_and_update_lock_history, history_event_data
 
 from homeassistant.util import dt as dt_util
 from homeassistant.core import HomeAssistant
@@ -12,17 +14,24 @@ from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, Upda
 
 
 from .const import (
-    DOMAIN, CONF_APX_NUM_LOCKS, LOCK_REQUEST_RETRIES, STATE_QUERY_INTERVAL, DETAILS_UPDATE_INTERVAL, \
-    HISTORY_DISPLAY_LIMIT, HISTORY_INTERVAL, TOKEN_401s_BEFORE_REAUTH, TOKEN_401s_BEFORE_ALERT, \
+    DOMAIN, LOCK_LIST_PAGE_SIZE, LOCK_LIST_MAX_PAGES, \
+    HISTORY_DISPLAY_LIMIT, TOKEN_401s_BEFORE_REAUTH, TOKEN_401s_BEFORE_ALERT, \
     KEYLIST_ENDPOINT, LOCK_DETAIL_ENDPOINT, QUERY_STATE_ENDPOINT, LOCK_ENDPOINT, UNLOCK_ENDPOINT,
-    LOCK_HISTORY_ENDPOINT,
+    LOCK_HISTORY_ENDPOINT, HISTORY_STORAGE_DIR, HISTORY_CACHE_TTL, HISTORY_PAGE_SIZE, HISTORY_SYNC_MAX_PAGES,
+    HISTORY_EXPORT_MAX_PAGES,
+    CONF_HISTORY_ENTRIES, CONF_POLL_CONCURRENCY, DEFAULT_POLL_CONCURRENCY, EVENT_LOCK_HISTORY,
+    CONF_BACKFILL_DAYS, DEFAULT_BACKFILL_DAYS, BACKFILL_INTERVAL,
+    POLL_CYCLE_DEADLINES, POLL_LOCK_DEADLINES, LOCK_CONFIRM_TIMEOUT, LOCK_CONFIRM_INITIAL_DELAY, LOCK_CONFIRM_MAX_DELAY, CONF_STATE_POLL_FLOOR, DEFAULT_STATE_POLL_FLOOR, CONF_STATE_POLL_CEILING, DEFAULT_STATE_POLL_CEILING,
+    STATE_POLL_TICK, CONF_OPTIMISTIC_LOCK, DEFAULT_OPTIMISTIC_LOCK,
 )
-from .token_manager import SifelyTokenManager
+from .token_manager import SifelyTokenManager, SifelyAuthError
+from .api import SifelyApiError, SifelyGatewayBusyError, SifelyUnauthorizedError
+from .snapshot import SifelySnapshot
+from .backfill import SifelyHistoryBackfill
+from .scheduler import SifelyPollScheduler
 
 _LOGGER = logging.getLogger(__name__)
 
-HISTORY_FOLDER = "history"
-
 class SifelyCoordinator(DataUpdateCoordinator):
     """Coordinates updates for Sifely locks."""
 
@@ -35,20 +44,44 @@ class SifelyCoordinator(DataUpdateCoordinator):
         self.hass = hass
         self.token_manager = token_manager
         self.config_entry = config_entry
-        self.session = token_manager.session
-        self.access_token = token_manager.access_token
-        self.apx_locks = config_entry.options.get(CONF_APX_NUM_LOCKS, 5)
+        self.api = token_manager.api
 
         if not self.access_token:
             raise UpdateFailed("❌ Could not retrieve valid login token.")
 
-        self.last_details_update = datetime.min.replace(tzinfo=timezone.utc)
         self.lock_list = []
         self.details_data = {}
         self.open_state_data = {}
+        self.state_updated_at = {}
+        self.details_updated_at = {}
+        self.restored_state = set()
+        self.restored_details = set()
+        self.snapshot_lock_list = []
+        self.snapshot = SifelySnapshot(hass, config_entry.entry_id)
+        self.history_path = hass.config.path(HISTORY_STORAGE_DIR)
+        backfill_days = int(config_entry.options.get(CONF_BACKFILL_DAYS, DEFAULT_BACKFILL_DAYS))
+        self.history_store = LockHistoryStore(self.history_path, retain_days=backfill_days)
         self._consecutive_401s = 0
-
-
+        self.initial_load_done = False
+        self.setup_timings = {}
+        self.metrics = {}
+        self.stale_locks = {job: set() for job in POLL_LOCK_DEADLINES}
+        self.optimistic = bool(config_entry.options.get(CONF_OPTIMISTIC_LOCK, DEFAULT_OPTIMISTIC_LOCK))
+        self.optimistic_state = {}
+        self._reconcile_tasks = {}
+        self._history_fetched_at = {}
+        self._history_inflight = {}
+        self._history_load_lock = asyncio.Lock()
+        self._history_listeners = {}
+        self.backfill = SifelyHistoryBackfill(hass, self, backfill_days)
+        self.poll_concurrency = max(1, int(config_entry.options.get(CONF_POLL_CONCURRENCY, DEFAULT_POLL_CONCURRENCY)))
+        # Shared by every run of a job, so overlapping runs stay within the poll concurrency
+        self._poll_slots = {job: asyncio.Semaphore(self.poll_concurrency) for job in POLL_LOCK_DEADLINES}
+        self.scheduler = SifelyPollScheduler(
+            self,
+            int(config_entry.options.get(CONF_STATE_POLL_FLOOR, DEFAULT_STATE_POLL_FLOOR)),
+            int(config_entry.options.get(CONF_STATE_POLL_CEILING, DEFAULT_STATE_POLL_CEILING)),
+        )
 
         super().__init__(
             hass,
@@ -61,221 +94,671 @@ class SifelyCoordinator(DataUpdateCoordinator):
         """Disabled auto-update mechanism (we handle it manually)."""
         return self.lock_list
 
-    async def async_fetch_lock_list(self):
-        """Get lock data from the Sifely API."""
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/x-www-form-urlencoded",
-        }
-        params = {
-            "pageNo": 1,
-            "pageSize": self.apx_locks,
-        }
+    @property
+    def access_token(self):
+        """Return the token manager's current access token."""
+        return self.token_manager.access_token
+
+    @property
+    def active_requests(self) -> int:
+        """Return the number of cloud requests currently in flight."""
+        return self.api.active_requests
+
+    async def _async_gather_with_deadline(self, job: str, queries: dict) -> dict:
+        """Run one query per lock, bounded by the poll concurrency, and return {lock_id: result}.
+
+        Each query is a coroutine function that returns None when its poll failed. A lock
+        gets POLL_LOCK_DEADLINES[job] seconds once it holds a concurrency slot, and the
+        whole run is cut off after POLL_CYCLE_DEADLINES[job], cancelling any lock still
+        queued or running. Only a successful result clears a lock's stale flag; locks
+        that fail or are cut off are marked stale. Counts are kept in self.metrics["deadlines"].
+        """
+        if not queries:
+            return {}
+
+        semaphore = self._poll_slots[job]
+        lock_deadline = POLL_LOCK_DEADLINES[job]
+        timed_out = []
+
+        async def _bounded(lock_id, query):
+            async with semaphore:
+                try:
+                    async with asyncio.timeout(lock_deadline):
+                        return await query()
+                except TimeoutError:
+                    timed_out.append(lock_id)
+                    return None
 
+        tasks = {lock_id: asyncio.ensure_future(_bounded(lock_id, query)) for lock_id, query in queries.items()}
         try:
-            _LOGGER.debug("📡 Fetching lock list from: %s", KEYLIST_ENDPOINT)
-            async with self.session.post(KEYLIST_ENDPOINT, headers=headers, params=params) as resp:
-                text = await resp.text()
-                _LOGGER.debug("🔑 Lock list raw response: %s", text)
-
-                try:
-                    data = json.loads(text)
-                except Exception as e:
-                    raise UpdateFailed(f"Failed to parse lock list response: {e}")
+            _done, pending = await asyncio.wait(tasks.values(), timeout=POLL_CYCLE_DEADLINES[job])
+        except asyncio.CancelledError:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+        stale = self.stale_locks[job]
+        results = {}
+        cut_off = []
+        for lock_id, task in tasks.items():
+            result = None
+            if task in pending:
+                cut_off.append(lock_id)
+            elif task.cancelled() or task.exception() is not None:
+                _LOGGER.warning("⚠️ %s poll for %s failed: %s", job, lock_id,
+                                "cancelled" if task.cancelled() else task.exception())
+            else:
+                result = task.result()
 
-                if resp.status != 200 or "list" not in data:
-                    raise UpdateFailed(f"Unexpected lock list response: {data}")
+            if result is None:
+                stale.add(lock_id)
+            else:
+                stale.discard(lock_id)
+                results[lock_id] = result
+
+        if timed_out or cut_off:
+            stats = self.metrics.setdefault("deadlines", {}).setdefault(
+                job, {"lock_timeouts": 0, "fired": 0, "cancelled": 0}
+            )
+            stats["lock_timeouts"] += len(timed_out)
+            if cut_off:
+                stats["fired"] += 1
+                stats["cancelled"] += len(cut_off)
+            stats["last_fired"] = dt_util.utcnow().isoformat()
+        if timed_out:
+            _LOGGER.warning("⏰ %s poll for %s exceeded the %ds per-lock deadline; marked stale",
+                            job, sorted(timed_out), lock_deadline)
+        if cut_off:
+            _LOGGER.warning("⏰ %s poll hit its %ds deadline; %d locks cancelled and marked stale: %s",
+                            job, POLL_CYCLE_DEADLINES[job], len(cut_off), sorted(cut_off))
+        return results
 
-                locks = data["list"]
-                self.lock_list = locks
-                _LOGGER.info("✅ Fetched %d locks", len(locks))
-                return locks
+    async def async_fetch_lock_list(self):
+        """Get lock data from the Sifely API, following every page of the key list."""
+        pages = {}
+        try:
+            async for page_no, page_locks in self.async_iter_lock_list_pages():
+                pages[page_no] = page_locks
 
+        except UpdateFailed:
+            raise
         except Exception as e:
             _LOGGER.exception("🚨 Failed to fetch lock list: %s", str(e))
             raise UpdateFailed(f"Exception fetching locks: {str(e)}")
 
-    async def async_query_open_state(self):
-        """Query open/locked state for each lock and store in self.open_state_data."""
-        if not self.lock_list:
-            _LOGGER.debug("⏩ Skipping open state polling: lock list not available")
+        locks = []
+        seen_ids = set()
+        for page_no in sorted(pages):
+            for lock in pages[page_no]:
+                lock_id = lock.get("lockId")
+                if lock_id is not None and lock_id in seen_ids:
+                    continue
+                seen_ids.add(lock_id)
+                locks.append(lock)
+
+        self.lock_list = locks
+        self.snapshot.async_schedule_save(self)
+        _LOGGER.info("✅ Fetched %d locks across %d page(s)", len(locks), len(pages))
+        return locks
+
+    async def async_iter_lock_list_pages(self):
+        """Yield (page_no, locks) for each lock list page as it arrives.
+
+        The first page is fetched alone. If it reports the page count (or a total,
+        divided by the page size the server actually returned), the remaining pages are
+        fetched concurrently (bounded by the poll concurrency) and yielded in completion
+        order; otherwise pages are walked one at a time until an empty page. A short
+        page never ends paging on its own, since the server may cap pageSize.
+        """
+        first = await self._async_fetch_lock_list_page(1)
+        first_locks = first["list"]
+        yield 1, first_locks
+
+        if not first_locks:
             return
 
-        if not hasattr(self, "_consecutive_401s"):
-            self._consecutive_401s = 0
+        total_pages = first.get("pages")
+        if not isinstance(total_pages, int) and isinstance(first.get("total"), int):
+            total_pages = -(-first["total"] // len(first_locks))
 
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/x-www-form-urlencoded",
-        }
+        if isinstance(total_pages, int):
+            if total_pages <= 1:
+                return
+            if total_pages > LOCK_LIST_MAX_PAGES:
+                _LOGGER.warning("⚠️ Lock list exceeded %d pages; remaining locks ignored", LOCK_LIST_MAX_PAGES)
+                total_pages = LOCK_LIST_MAX_PAGES
+            semaphore = asyncio.Semaphore(self.poll_concurrency)
 
-        for lock in self.lock_list:
-            lock_id = lock.get("lockId")
-            if not lock_id:
-                _LOGGER.warning("🔑 Skipping lock with missing lockId: %s", lock)
-                continue
+            async def _bounded_fetch(page_no):
+                async with semaphore:
+                    return page_no, await self._async_fetch_lock_list_page(page_no)
 
-            url = f"{QUERY_STATE_ENDPOINT}?lockId={lock_id}"
+            tasks = [asyncio.ensure_future(_bounded_fetch(n)) for n in range(2, total_pages + 1)]
             try:
-                async with self.session.get(url, headers=headers) as resp:
-                    text = await resp.text()
-                    _LOGGER.debug("🔒 Open state response for %s: %s", lock_id, text)
-
-                    try:
-                        data = json.loads(text)
-
-                        if resp.status == 200:
-                            self._consecutive_401s = 0
-                            if hasattr(self, "clear_cloud_error"):
-                                self.clear_cloud_error()
-
-                            if "code" in data:
-                                if data.get("code") == 200:
-                                    self.open_state_data[lock_id] = data.get("data", {}).get("state")
-                                elif data.get("code") == -3003:
-                                    _LOGGER.debug("⏳ Gateway busy when querying state for %s. Will retry.", lock_id)
-                                else:
-                                    _LOGGER.warning("⚠️ Unexpected open state for %s: %s", lock_id, data)
+                for next_done in asyncio.as_completed(tasks):
+                    page_no, page = await next_done
+                    yield page_no, page["list"]
+            finally:
+                for task in tasks:
+                    task.cancel()
+            return
 
-                            elif "state" in data:
-                                self.open_state_data[lock_id] = data.get("state")
-                            else:
-                                _LOGGER.warning("⚠️ Unknown open state format for %s: %s", lock_id, data)
+        for page_no in range(2, LOCK_LIST_MAX_PAGES + 1):
+            page_locks = (await self._async_fetch_lock_list_page(page_no))["list"]
+            if not page_locks:
+                return
+            yield page_no, page_locks
 
-                        elif resp.status == 401:
-                            self._consecutive_401s += 1
-                            _LOGGER.warning("⚠️ Received 401 (#%d) when fetching state for %s", self._consecutive_401s, lock_id)
+        _LOGGER.warning("⚠️ Lock list exceeded %d pages; remaining locks ignored", LOCK_LIST_MAX_PAGES)
 
-                            if self._consecutive_401s == TOKEN_401s_BEFORE_REAUTH:
-                                _LOGGER.warning(f"🔁 Detected {TOKEN_401s_BEFORE_REAUTH} consecutive 401s. Triggering token refresh...")
-                                await self.token_manager.refresh_login_token()
+    async def _async_fetch_lock_list_page(self, page_no: int) -> dict:
+        """Fetch and parse one page of the key list."""
+        params = {
+            "pageNo": page_no,
+            "pageSize": LOCK_LIST_PAGE_SIZE,
+        }
 
-                            if self._consecutive_401s >= TOKEN_401s_BEFORE_ALERT:
-                                if hasattr(self, "set_cloud_error"):
-                                    self.set_cloud_error(f"Exceeded {TOKEN_401s_BEFORE_ALERT} consecutive 401 errors. Token likely invalid.")
+        _LOGGER.debug("📡 Fetching lock list page %d from: %s", page_no, KEYLIST_ENDPOINT)
+        try:
+            data = await self.api.async_request("POST", KEYLIST_ENDPOINT, params=params)
+        except SifelyApiError as e:
+            raise UpdateFailed(f"Failed to fetch lock list: {e}")
 
-                        else:
-                            _LOGGER.warning("⚠️ HTTP %d when fetching state for %s: %s", resp.status, lock_id, text)
+        if not isinstance(data, dict) or not isinstance(data.get("list"), list):
+            raise UpdateFailed(f"Unexpected lock list response: {data}")
 
-                    except Exception as e:
-                        _LOGGER.warning("❌ Failed to parse open state for %s: %s", lock_id, e)
+        return data
 
-            except Exception as e:
-                _LOGGER.warning("🚫 Failed to fetch open state for %s: %s", lock_id, e)
+    async def async_query_open_state(self, lock_ids: list[int] | None = None):
+        """Query open/locked state for each lock (or just lock_ids) and store in self.open_state_data.
 
+        Locks are queried concurrently, bounded by the configured poll concurrency,
+        and each result is merged into open_state_data as soon as it arrives. Locks
+        that fail or miss their deadline keep their last state and are marked stale. A lock
+        with a busy gateway gives its slot back instead of waiting in it; the scheduler
+        retries it once the busy period ends.
+        """
+        if not self.lock_list:
+            _LOGGER.debug("⏩ Skipping open state polling: lock list not available")
+            return
 
-    async def async_query_lock_details(self) -> dict:
-        """Query detailed lock info for each lock and store in self.details_data."""
-        self.details_data = {}  # Reset it fresh each call
+        tasks = {}
+        for lock in self.lock_list:
+            lock_id = lock.get("lockId")
+            if not lock_id:
+                _LOGGER.warning("🔑 Skipping lock with missing lockId: %s", lock)
+                continue
+            if lock_ids is None or lock_id in lock_ids:
+                tasks[lock_id] = partial(self._async_query_lock_open_state, lock_id, wait_busy=False)
+
+        await self._async_gather_with_deadline("state", tasks)
+        self.snapshot.async_schedule_save(self)
+
+    def _set_open_state(self, lock_id: int, state):
+        """Store a live open state for a lock, replacing any restored value."""
+        changed = (
+            lock_id in self.open_state_data
+            and lock_id not in self.restored_state
+            and self.open_state_data[lock_id] != state
+        )
+        self.scheduler.record_state(lock_id, changed)
+        self.open_state_data[lock_id] = state
+        self.state_updated_at[lock_id] = time.time()
+        self.restored_state.discard(lock_id)
+
+    async def _async_query_lock_open_state(self, lock_id: int, wait_busy: bool = True) -> bool | None:
+        """Query the open/locked state of a single lock, returning True once it is stored (None on failure)."""
+        url = f"{QUERY_STATE_ENDPOINT}?lockId={lock_id}"
+        try:
+            data = await self.api.async_request("GET", url, lock_id=lock_id, wait_busy=wait_busy)
+        except SifelyGatewayBusyError:
+            _LOGGER.debug("⏳ Gateway busy when querying state for %s", lock_id)
+            return
+        except SifelyUnauthorizedError:
+            await self._async_handle_401(lock_id)
+            return
+        except SifelyApiError as e:
+            _LOGGER.warning("🚫 Failed to fetch open state for %s: %s", lock_id, e)
+            return
 
+        self._consecutive_401s = 0
+        self.clear_cloud_error()
+
+        if isinstance(data, dict) and "state" in data:
+            self._set_open_state(lock_id, data["state"])
+            return True
+        else:
+            _LOGGER.warning("⚠️ Unknown open state format for %s: %s", lock_id, data)
+
+    async def _async_handle_401(self, lock_id: int):
+        """Count a 401 that survived the token-refresh retry and force a re-login at the threshold.
+
+        The counter is only touched between awaits, so when many concurrent requests
+        fail at once exactly one of them reaches the threshold and re-authenticates.
+        """
+        self._consecutive_401s += 1
+        count = self._consecutive_401s
+        _LOGGER.warning("⚠️ Received 401 (#%d) when fetching state for %s", count, lock_id)
+
+        if count >= TOKEN_401s_BEFORE_ALERT:
+            if hasattr(self, "set_cloud_error"):
+                self.set_cloud_error(f"Exceeded {TOKEN_401s_BEFORE_ALERT} consecutive 401 errors. Token likely invalid.")
+
+        if count == TOKEN_401s_BEFORE_REAUTH:
+            _LOGGER.warning(f"🔁 Detected {TOKEN_401s_BEFORE_REAUTH} consecutive 401s. Triggering token refresh...")
+            try:
+                await self.token_manager.refresh_login_token()
+            except SifelyAuthError as e:
+                if hasattr(self, "set_cloud_error"):
+                    self.set_cloud_error(f"Token refresh failed: {e}")
+
+    async def async_query_lock_details(self, lock_ids: list[int] | None = None) -> dict:
+        """Query detailed lock info for each lock (or just lock_ids) and store in self.details_data.
+
+        The new snapshot is built off to the side with concurrent fetches and swapped in
+        at the end, so entities never see an empty details_data mid-cycle. Locks whose
+        fetch fails (or the gateway is busy) keep their last good record, as do locks
+        outside lock_ids. Busy locks are not waited for inside a concurrency slot.
+        """
         if not self.lock_list:
             _LOGGER.debug("⏩ Skipping lock detail polling: lock list not available")
             return self.details_data
 
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/x-www-form-urlencoded",
-        }
-
+        tasks = {}
         for lock in self.lock_list:
             lock_id = lock.get("lockId")
             if not lock_id:
                 _LOGGER.warning("🔑 Skipping lock with missing lockId: %s", lock)
                 continue
+            if lock_ids is None or lock_id in lock_ids:
+                tasks[lock_id] = partial(self._async_query_single_lock_details, lock_id, wait_busy=False)
 
-            url = f"{LOCK_DETAIL_ENDPOINT}?lockId={lock_id}"
-            try:
-                async with self.session.get(url, headers=headers) as resp:
-                    text = await resp.text()
-                    _LOGGER.debug("🔍 Lock detail response for %s: %s", lock_id, text)
+        results = await self._async_gather_with_deadline("details", tasks)
 
-                    try:
-                        data = json.loads(text)
+        new_details = {} if lock_ids is None else {
+            lock_id: data for lock_id, data in self.details_data.items() if lock_id not in lock_ids
+        }
+        now = time.time()
+        for lock_id in tasks:
+            lock_data = results.get(lock_id)
+            if lock_data is not None:
+                new_details[lock_id] = lock_data
+                self.details_updated_at[lock_id] = now
+                self.restored_details.discard(lock_id)
+            elif lock_id in self.details_data:
+                new_details[lock_id] = self.details_data[lock_id]
+
+        self.details_data = new_details  # ✅ Atomic swap
+        self.snapshot.async_schedule_save(self)
+        return self.details_data  # ✅ Explicit return
 
-                        if resp.status == 200:
-                            if data.get("code") == 200 and isinstance(data.get("data"), dict):
-                                # ✅ Standard format
-                                lock_data = data["data"]
-                                self.details_data[lock_id] = lock_data
-                                _LOGGER.debug("✅ Parsed wrapped lock detail for %s", lock_id)
+    async def _async_query_single_lock_details(self, lock_id: int, wait_busy: bool = True) -> dict | None:
+        """Fetch details for a single lock, returning None when no fresh record is available."""
+        url = f"{LOCK_DETAIL_ENDPOINT}?lockId={lock_id}"
+        try:
+            data = await self.api.async_request("GET", url, lock_id=lock_id, wait_busy=wait_busy)
+        except SifelyGatewayBusyError:
+            _LOGGER.debug("⏳ Gateway busy when querying details for %s", lock_id)
+            return None
+        except SifelyApiError as e:
+            _LOGGER.warning("🚫 Failed to fetch lock detail for %s: %s", lock_id, e)
+            return None
 
-                            elif data.get("code") == -3003:
-                                _LOGGER.debug("⏳ Gateway busy when querying details for %s. Will retry.", lock_id)
+        # Both the {"code": 200, "data": {...}} wrapper and raw lock data decode to the detail dict
+        if isinstance(data, dict) and "code" not in data and data:
+            return data
 
-                            elif "lockId" in data:
-                                # ✅ Some devices return raw lock data directly
-                                self.details_data[lock_id] = data
-                                _LOGGER.debug("ℹ️ Parsed unwrapped lock detail for %s", lock_id)
+        _LOGGER.warning("⚠️ Unexpected lock detail format for %s: %s", lock_id, data)
+        return None
 
-                            else:
-                                _LOGGER.warning("⚠️ Unexpected lock detail format for %s: %s", lock_id, data)
+    async def async_send_lock_command(self, lock_id: int, lock: bool) -> bool:
+        """Send a lock or unlock command to a specific lock.
 
-                        else:
-                            _LOGGER.warning("🚫 Non-200 HTTP status %s for lock %s", resp.status, lock_id)
+        Busy gateways and transient errors are retried by the API client (up to
+        LOCK_REQUEST_RETRIES attempts, with backoff).
+        """
+        endpoint = LOCK_ENDPOINT if lock else UNLOCK_ENDPOINT
+        url = f"{endpoint}?lockId={lock_id}"
 
-                    except Exception as e:
-                        _LOGGER.warning("❌ Failed to parse lock detail for %s: %s", lock_id, e)
+        try:
+            await self.api.async_request("POST", url, lock_id=lock_id, require_code=True)
+        except SifelyApiError as e:
+            _LOGGER.warning("⚠️ Failed to %s lock %s: %s", "lock" if lock else "unlock", lock_id, e)
+            return False
+
+        _LOGGER.info("✅ Successfully sent %s command to lock %s", "lock" if lock else "unlock", lock_id)
+        self.scheduler.mark_active(lock_id)
+        return True
+
+    async def async_confirm_lock_state(self, lock_id: int, locked: bool) -> bool:
+        """Poll one lock until it reports the commanded state, or LOCK_CONFIRM_TIMEOUT expires.
+
+        The cloud acknowledges a command before the gateway has moved the bolt, so the
+        lock is re-queried with a doubling delay (capped at LOCK_CONFIRM_MAX_DELAY).
+        Each query, including its API retries, is cut off at the overall deadline.
+        Returns True once the reported state matches.
+        """
+        expected = 0 if locked else 1  # Sifely: 0 = locked, 1 = unlocked
+        deadline = time.monotonic() + LOCK_CONFIRM_TIMEOUT
+        delay = LOCK_CONFIRM_INITIAL_DELAY
+
+        while True:
+            # Leave the last query at least one initial delay to run before the deadline
+            await asyncio.sleep(min(delay, max(0, deadline - time.monotonic() - LOCK_CONFIRM_INITIAL_DELAY)))
+            try:
+                async with asyncio.timeout(max(0, deadline - time.monotonic())):
+                    await self._async_query_lock_open_state(lock_id)
+            except TimeoutError:
+                _LOGGER.debug("⏰ State query for %s cut off at the confirmation deadline", lock_id)
+
+            if self.open_state_data.get(lock_id) == expected:
+                _LOGGER.debug("✅ Lock %s confirmed %s", lock_id, "locked" if locked else "unlocked")
+                return True
+
+            if time.monotonic() >= deadline:
+                _LOGGER.warning("⏰ Lock %s did not report %s within %ds", lock_id,
+                                "locked" if locked else "unlocked", LOCK_CONFIRM_TIMEOUT)
+                return False
+            delay = min(delay * 2, LOCK_CONFIRM_MAX_DELAY)
+
+    def async_start_reconciliation(self, lock_id: int, locked: bool):
+        """Show the commanded state right away and confirm it with the cloud in the background.
+
+        The expected state is served from optimistic_state until confirmation ends;
+        on a mismatch or timeout it is dropped, so entities roll back to the state
+        the cloud reports. A newer command for the same lock replaces the pending one.
+        """
+        previous = self._reconcile_tasks.pop(lock_id, None)
+        if previous:
+            previous.cancel()
+
+        self.optimistic_state[lock_id] = 0 if locked else 1  # Sifely: 0 = locked, 1 = unlocked
+        self._reconcile_tasks[lock_id] = self.config_entry.async_create_background_task(
+            self.hass, self._async_reconcile(lock_id, locked), f"sifely_cloud_reconcile_{lock_id}"
+        )
 
-            except Exception as e:
-                _LOGGER.warning("🚫 Failed to fetch lock detail for %s: %s", lock_id, e)
+    async def _async_reconcile(self, lock_id: int, locked: bool):
+        started = time.monotonic()
+        confirmed = await self.async_confirm_lock_state(lock_id, locked)
+        latency = round(time.monotonic() - started, 3)
+
+        self._reconcile_tasks.pop(lock_id, None)
+        self.optimistic_state.pop(lock_id, None)
+        if not confirmed:
+            _LOGGER.warning("↩️ Rolling back optimistic %s state for lock %s", "locked" if locked else "unlocked", lock_id)
+
+        stats = self.metrics.setdefault("reconciliation", {
+            "confirmed": 0, "rolled_back": 0, "last_latency": None, "max_latency": 0.0, "total_latency": 0.0,
+        })
+        stats["confirmed" if confirmed else "rolled_back"] += 1
+        stats["last_latency"] = latency
+        stats["max_latency"] = max(stats["max_latency"], latency)
+        stats["total_latency"] = round(stats["total_latency"] + latency, 3)
+        self.async_update_listeners()
+
+    async def async_query_new_lock_history(
+        self, lock_id: int, since: int | None, wait_busy: bool = True, until: int | None = None
+    ) -> tuple[list, bool] | None:
+        """Fetch every record with since <= lockDate <= until (ms, default now), newest first.
+
+        Returns (records, caught_up); caught_up is False when HISTORY_SYNC_MAX_PAGES ran
+        out before the window was covered, leaving records older than the ones returned.
+        With no watermark yet only the newest page is fetched. Returns None if any page
+        fails, so the caller keeps its watermark and retries the whole window next time
+        instead of leaving a gap behind newer records.
+        """
+        if since is None:
+            page = await self.async_fetch_history_page(lock_id, 1, HISTORY_DISPLAY_LIMIT, wait_busy=wait_busy)
+            return (page["list"], True) if page else None
+
+        end_date = until if until is not None else int(time.time() * 1000)
+        records = []
+        for page_no in range(1, HISTORY_SYNC_MAX_PAGES + 1):
+            page = await self.async_fetch_history_page(
+                lock_id, page_no, HISTORY_PAGE_SIZE, start_date=since, end_date=end_date, wait_busy=wait_busy
+            )
+            if page is None:
+                return None
+
+            page_records = page["list"]
+            records.extend(page_records)
+
+            pages = page.get("pages")
+            if len(page_records) < HISTORY_PAGE_SIZE or (isinstance(pages, int) and page_no >= pages):
+                return records, True
+
+        _LOGGER.warning("⚠️ History for %s still not caught up after %d pages; continuing next cycle",
+                        lock_id, HISTORY_SYNC_MAX_PAGES)
+        return records, False
+
+    async def async_iter_history_pages(self, lock_id: int, start_date: int, end_date: int):
+        """Yield each page of raw records for a date range (ms), newest first, as it arrives.
+
+        Raises UpdateFailed if a page cannot be fetched, so partial exports are reported.
+        """
+        for page_no in range(1, HISTORY_EXPORT_MAX_PAGES + 1):
+            page = await self.async_fetch_history_page(
+                lock_id, page_no, HISTORY_PAGE_SIZE, start_date=start_date, end_date=end_date
+            )
+            if page is None:
+                raise UpdateFailed(f"History page {page_no} failed for lock {lock_id}")
+
+            records = page["list"]
+            if records:
+                yield records
+
+            pages = page.get("pages")
+            if len(records) < HISTORY_PAGE_SIZE or (isinstance(pages, int) and page_no >= pages):
+                return
+
+        _LOGGER.warning("⚠️ History export for %s stopped after %d pages", lock_id, HISTORY_EXPORT_MAX_PAGES)
+
+    async def async_fetch_history_page(
+        self,
+        lock_id: int,
+        page_no: int,
+        page_size: int,
+        start_date: int | None = None,
+        end_date: int | None = None,
+        wait_busy: bool = True,
+    ) -> dict | None:
+        """Fetch one page of lock records, returning the parsed response or None on failure."""
+        url = f"{LOCK_HISTORY_ENDPOINT}?lockId={lock_id}&pageNo={page_no}&pageSize={page_size}"
+        if start_date is not None:
+            url += f"&startDate={start_date}"
+        if end_date is not None:
+            url += f"&endDate={end_date}"
 
-        return self.details_data  # ✅ Explicit return
+        try:
+            data = await self.api.async_request("GET", url, lock_id=lock_id, wait_busy=wait_busy)
+        except SifelyGatewayBusyError:
+            _LOGGER.debug("⏳ Gateway busy when fetching history for %s", lock_id)
+            return None
+        except SifelyApiError as e:
+            _LOGGER.warning("❌ Failed to fetch lock history for %s: %s", lock_id, e)
+            return None
 
+        if isinstance(data, dict) and isinstance(data.get("list"), list):
+            return data
 
-    async def async_send_lock_command(self, lock_id: int, lock: bool) -> bool:
-        """Send a lock or unlock command to a specific lock."""
-        endpoint = LOCK_ENDPOINT if lock else UNLOCK_ENDPOINT
-        url = f"{endpoint}?lockId={lock_id}"
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/x-www-form-urlencoded",
+        _LOGGER.warning("⚠️ Unexpected lock history for %s: %s", lock_id, data)
+        return None
+
+    def restored_attributes(self, lock_id: int, kind: str = "state") -> dict:
+        """Return attributes marking a value served from the snapshot (or stale), with its age.
+
+        A lock is stale when its last scheduled poll failed or missed its deadline. Empty once live
+        data has replaced the value, so polling does not keep changing attributes (and
+        writing recorder rows).
+        """
+        restored, updated_at = (
+            (self.restored_state, self.state_updated_at) if kind == "state"
+            else (self.restored_details, self.details_updated_at)
+        )
+        stale = lock_id in self.stale_locks[kind]
+        if lock_id not in restored and not stale:
+            return {}
+
+        attrs = {"restored": True} if lock_id in restored else {}
+        if stale:
+            attrs["stale"] = True
+        if updated_at.get(lock_id):
+            attrs["last_seen"] = datetime.fromtimestamp(updated_at[lock_id], tz=timezone.utc).isoformat()
+        return attrs
+
+    async def async_load_history_store(self, lock_ids: list[int] | None = None):
+        """Index the on-disk history files of locks (default: all known) not loaded yet, in the executor."""
+        if lock_ids is None:
+            lock_ids = [lock["lockId"] for lock in self.lock_list if lock.get("lockId")]
+        if all(self.history_store.is_loaded(lock_id) for lock_id in lock_ids):
+            return
+        limit = self.config_entry.options.get(CONF_HISTORY_ENTRIES, 20)
+        async with self._history_load_lock:
+            await self.hass.async_add_executor_job(self.history_store.load, lock_ids, limit)
+
+    async def async_get_lock_history(
+        self, lock_id: int, max_age: float = HISTORY_CACHE_TTL, flush: bool = True, wait_busy: bool = True
+    ) -> list[dict]:
+        """Return the lock's recent history rows, fetching from the cloud at most once per max_age.
+
+        This is the single entry point for history consumers (sensors, the scheduled job,
+        diagnostics). Concurrent callers for the same lock share one in-flight fetch, and
+        history listeners for the lock are notified when new data arrives.
+        """
+        limit = self.config_entry.options.get(CONF_HISTORY_ENTRIES, 20)
+        fetched_at = self._history_fetched_at.get(lock_id)
+        if fetched_at is not None and time.monotonic() - fetched_at < max_age:
+            return self.history_store.recent(lock_id, limit)
+
+        task = self._history_inflight.get(lock_id)
+        if task is None:
+            task = self.hass.async_create_task(self._async_fetch_lock_history(lock_id, flush, wait_busy))
+            self._history_inflight[lock_id] = task
+            task.add_done_callback(lambda _: self._history_inflight.pop(lock_id, None))
+
+        return await asyncio.shield(task)
+
+    async def _async_fetch_lock_history(self, lock_id: int, flush: bool, wait_busy: bool) -> list[dict]:
+        await self.async_load_history_store([lock_id])
+        seeded = lock_id in self.history_store.watermarks
+        fresh_rows = await fetch_and_update_lock_history(self, lock_id, flush=flush, wait_busy=wait_busy)
+        self._history_fetched_at[lock_id] = time.monotonic()
+
+        # 📣 One bus event per genuinely new record (not for the initial seed of an empty history)
+        if seeded:
+            if fresh_rows:
+                self.scheduler.mark_active(lock_id)
+            alias = self.lock_alias(lock_id)
+            for row in fresh_rows:
+                self.hass.bus.async_fire(EVENT_LOCK_HISTORY, history_event_data(lock_id, alias, row))
+
+        entries = self.history_store.recent(lock_id, self.config_entry.options.get(CONF_HISTORY_ENTRIES, 20))
+
+        for listener in list(self._history_listeners.get(lock_id, [])):
+            listener(entries)
+        return entries
+
+    def lock_alias(self, lock_id: int) -> str | None:
+        """Return the alias of a lock from the lock list."""
+        for lock in self.lock_list:
+            if lock.get("lockId") == lock_id:
+                return lock.get("lockAlias")
+        return None
+
+    def async_add_history_listener(self, lock_id: int, listener) -> callable:
+        """Register a callback receiving the lock's recent history rows; returns an unsubscribe."""
+        listeners = self._history_listeners.setdefault(lock_id, [])
+        listeners.append(listener)
+
+        def _remove():
+            listeners.remove(listener)
+
+        return _remove
+
+    def history_cache_info(self) -> dict:
+        """Return per-lock history cache age and size for diagnostics."""
+        limit = self.config_entry.options.get(CONF_HISTORY_ENTRIES, 20)
+        now = time.monotonic()
+        return {
+            lock_id: {
+                "age_seconds": round(now - fetched_at, 1),
+                "entries": len(self.history_store.recent(lock_id, limit)),
+            }
+            for lock_id, fetched_at in self._history_fetched_at.items()
         }
 
-        for attempt in range(1, LOCK_REQUEST_RETRIES + 1):
-            try:
-                async with self.session.post(url, headers=headers) as resp:
-                    text = await resp.text()
-                    _LOGGER.debug("🔐 Lock command response (attempt %d) for %s: %s", attempt, lock_id, text)
-
-                    try:
-                        result = json.loads(text)
-                        if resp.status == 200 and result.get("errcode") == 0:
-                            _LOGGER.info("✅ Successfully sent %s command to lock %s", "lock" if lock else "unlock", lock_id)
-                            return True
-                        else:
-                            _LOGGER.warning("⚠️ Failed to %s lock %s (attempt %d): %s", "lock" if lock else "unlock", lock_id, attempt, result)
-                    except Exception as e:
-                        _LOGGER.warning("❌ Failed to parse %s response for lock %s: %s", "lock" if lock else "unlock", lock_id, e)
+    async def async_update_all_history(self, lock_ids: list[int] | None = None):
+        """Update history for every lock (or just lock_ids) concurrently and write all new rows in one batch.
+
+        The scheduler decides when each lock is due, so the history cache is bypassed
+        (its TTL is longer than the shortest jittered interval). Records the cycle
+        duration, new record count and per-lock failures in self.metrics["history"].
+        """
+        started = time.monotonic()
+        if lock_ids is None:
+            lock_ids = [lock["lockId"] for lock in self.lock_list if lock.get("lockId")]
+        await self.async_load_history_store(lock_ids)
 
+        failures = {}
+
+        async def _update(lock_id):
+            try:
+                await self.async_get_lock_history(lock_id, max_age=0, flush=False, wait_busy=False)
             except Exception as e:
-                _LOGGER.warning("🚫 Request error on %s command attempt %d for lock %s: %s", "lock" if lock else "unlock", attempt, lock_id, e)
+                failures[lock_id] = str(e)
+                _LOGGER.warning("⚠️ Failed updating history for %s: %s", lock_id, e)
+                return None
+            return True
 
-        return False  # All retries failed
+        await self._async_gather_with_deadline("history", {lock_id: partial(_update, lock_id) for lock_id in lock_ids})
 
-    async def async_query_lock_history(self, lock_id: int) -> list:
-        """Fetch lock history records for a given lock."""
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/x-www-form-urlencoded",
+        pending = sum(len(rows) for rows in self.history_store.pending.values())
+        await self.history_store.async_flush(self.hass)
+
+        duration = round(time.monotonic() - started, 3)
+        self.metrics["history"] = {
+            "last_run": dt_util.utcnow().isoformat(),
+            "duration": duration,
+            "locks": len(lock_ids),
+            "new_records": pending,
+            "failures": failures,
         }
+        _LOGGER.debug("📜 History cycle: %d locks, %d new records, %d failures in %.3fs",
+                      len(lock_ids), pending, len(failures), duration)
 
-        url = f"{LOCK_HISTORY_ENDPOINT}?lockId={lock_id}&pageNo=1&pageSize={HISTORY_DISPLAY_LIMIT}"
+    async def async_load_initial_data(self):
+        """Load lock details and open state concurrently after setup, then notify entities."""
+        started = time.monotonic()
 
-        try:
-            async with self.session.get(url, headers=headers) as resp:
-                text = await resp.text()
-                _LOGGER.debug("📜 Lock history response for %s: %s", lock_id, text)
+        if not self.lock_list:
+            # Setup fell back to the snapshot lock list; try the cloud again first
+            try:
+                await self.async_fetch_lock_list()
+            except UpdateFailed:
+                self.lock_list = list(self.snapshot_lock_list)
 
-                data = json.loads(text)
-                if resp.status == 200 and "list" in data:
-                    return data["list"]
-                else:
-                    _LOGGER.warning("⚠️ Unexpected lock history for %s: %s", lock_id, data)
-                    return []
+        async def _timed(name, coro):
+            phase_started = time.monotonic()
+            await coro
+            self.setup_timings[name] = round(time.monotonic() - phase_started, 3)
 
-        except Exception as e:
-            _LOGGER.warning("❌ Failed to fetch lock history for %s: %s", lock_id, e)
-            return []
+        try:
+            await asyncio.gather(
+                _timed("initial_details", self.async_query_lock_details()),
+                _timed("initial_state", self.async_query_open_state()),
+            )
+        finally:
+            self.scheduler.start()
+            self.initial_load_done = True
+            self.setup_timings["initial_load"] = round(time.monotonic() - started, 3)
+            _LOGGER.info("⏱️ Initial Sifely data load finished in %.3fs: %s",
+                         self.setup_timings["initial_load"], self.setup_timings)
+            self.async_update_listeners()
 
     def set_cloud_error(self, message: str):
         """Set the error sensor to an alert state."""
@@ -306,50 +789,54 @@ async def setup_sifely_coordinator(
     token_manager: SifelyTokenManager,
     config_entry,
 ) -> SifelyCoordinator:
-    """Initialize, refresh, and store the coordinator."""
+    """Initialize and store the coordinator, then load lock data in the background.
+
+    Only the lock list is awaited, since entities are created from it. Details, open
+    state and history load concurrently afterwards so setup does not grow with the
+    number of locks or hold up Home Assistant startup.
+    """
     coordinator = SifelyCoordinator(hass, token_manager, config_entry)
 
-    # 📡 Step 1: Fetch initial lock list
-    locks = await coordinator.async_fetch_lock_list()
+    # 💾 Step 1: Restore last-known data so entities have values right away
+    started = time.monotonic()
+    await coordinator.snapshot.async_restore(coordinator)
+    coordinator.setup_timings["snapshot"] = round(time.monotonic() - started, 3)
+
+    # 📡 Step 2: Fetch initial lock list (fall back to the snapshot copy if the cloud is unreachable)
+    started = time.monotonic()
+    try:
+        locks = await coordinator.async_fetch_lock_list()
+    except UpdateFailed:
+        if not coordinator.snapshot_lock_list:
+            raise
+        _LOGGER.warning("⚠️ Lock list unavailable, starting from %d locks in the snapshot",
+                        len(coordinator.snapshot_lock_list))
+        locks = list(coordinator.snapshot_lock_list)
     coordinator.data = locks  # 🔥 Set initial data for entities
-
-    # 🔋 Step 2: Immediately fetch lock details (so battery sensors are ready)
-    coordinator.details_data = await coordinator.async_query_lock_details()
+    coordinator.setup_timings["lock_list"] = round(time.monotonic() - started, 3)
 
     # 💾 Register the coordinator globally
     hass.data.setdefault(DOMAIN, {})["coordinator"] = coordinator
 
-    # 🆕 RUN HISTORY UPDATE ONCE AT STARTUP
-    async def _run_history_update(now=None):  # <-- allow 'now' to be optional for direct call
-        _LOGGER.debug("⏱️ Scheduled task: Fetching lock history diffs")
-
-        for lock in coordinator.lock_list:
-            lock_id = lock.get("lockId")
-            if not lock_id:
-                continue
-
-            try:
-                entries = await fetch_and_update_lock_history(coordinator, lock_id)
-                if hasattr(coordinator, "update_history_sensor"):
-                    await coordinator.update_history_sensor(lock_id, entries)
-            except Exception as e:
-                _LOGGER.warning("⚠️ Failed updating history for %s: %s", lock_id, e)
-
-    # ⏱️ Step 3: Schedule recurring updates
-    async def _run_lock_details(now):
-        _LOGGER.debug("⏱️ Scheduled task: Fetching lock details")
-        await coordinator.async_query_lock_details()
-
-    async def _run_open_state(now):
-        _LOGGER.debug("⏱️ Scheduled task: Fetching open/closed state")
-        await coordinator.async_query_open_state()
-
-    # 🆕 Call history update once immediately
-    hass.async_create_task(_run_history_update())
-
-    # ⏱️ Schedule repeating updates
-    async_track_time_interval(hass, _run_lock_details, timedelta(seconds=DETAILS_UPDATE_INTERVAL))
-    async_track_time_interval(hass, _run_open_state, timedelta(seconds=STATE_QUERY_INTERVAL))
-    async_track_time_interval(hass, _run_history_update, timedelta(seconds=HISTORY_INTERVAL))
+    async def _run_history_update():
+        _LOGGER.debug("⏱️ Initial task: Fetching lock history diffs")
+        await coordinator.async_update_all_history()
+
+    # 🔋 Step 3: Load details, state and history in the background (entities show as restoring until then)
+    config_entry.async_create_background_task(
+        hass, coordinator.async_load_initial_data(), "sifely_cloud_initial_load"
+    )
+    config_entry.async_create_background_task(
+        hass, _run_history_update(), "sifely_cloud_initial_history"
+    )
+
+    # ⏱️ Step 4: Schedule repeating updates. State, details and history share one staggered
+    # per-lock timeline driven by a short tick; the idle-gated backfill keeps its own timer.
+    config_entry.async_on_unload(
+        async_track_time_interval(hass, coordinator.scheduler.async_tick, timedelta(seconds=STATE_POLL_TICK))
+    )
+    config_entry.async_on_unload(
+        async_track_time_interval(hass, coordinator.backfill.async_run, timedelta(seconds=BACKFILL_INTERVAL))
+    )
 
     return coordinator
@@ -0,0 +1,98 @@
+"""Persisted last-known-state snapshot for Sifely locks."""
+
+import logging
+import time
+
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    STORAGE_VERSION,
+    SNAPSHOT_STORAGE_KEY,
+    SNAPSHOT_SAVE_DELAY,
+    SNAPSHOT_LOCK_FIELDS,
+    SNAPSHOT_DETAIL_FIELDS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def get_snapshot_store(hass, entry_id: str) -> Store:
+    """Return the persistent snapshot store for a config entry."""
+    return Store(hass, STORAGE_VERSION, SNAPSHOT_STORAGE_KEY.format(entry_id=entry_id))
+
+
+def _compact(data: dict, fields: tuple) -> dict:
+    """Keep only the fields entities read (drops keys, passwords and other bulky fields)."""
+    return {key: data[key] for key in fields if key in data}
+
+
+class SifelySnapshot:
+    """Load and (debounced) save a compact copy of the coordinator's lock data."""
+
+    def __init__(self, hass, entry_id: str):
+        self._store = get_snapshot_store(hass, entry_id)
+        self._save_pending = False
+
+    async def async_restore(self, coordinator) -> bool:
+        """Populate the coordinator from the stored snapshot. Returns True if anything was restored."""
+        try:
+            stored = await self._store.async_load()
+        except Exception as e:
+            _LOGGER.warning("⚠️ Failed to load Sifely snapshot: %s", e)
+            return False
+
+        if not stored:
+            return False
+
+        locks = stored.get("locks", {})
+        for raw_id, entry in locks.items():
+            lock_id = int(raw_id)
+
+            if "state" in entry:
+                coordinator.open_state_data[lock_id] = entry["state"]
+                coordinator.state_updated_at[lock_id] = entry.get("state_updated_at")
+                coordinator.restored_state.add(lock_id)
+
+            if entry.get("details"):
+                coordinator.details_data[lock_id] = entry["details"]
+                coordinator.details_updated_at[lock_id] = entry.get("details_updated_at")
+                coordinator.restored_details.add(lock_id)
+
+        coordinator.snapshot_lock_list = stored.get("lock_list", [])
+        _LOGGER.info("💾 Restored last-known data for %d locks (saved %ds ago)",
+                     len(locks), time.time() - stored.get("saved_at", time.time()))
+        return True
+
+    def async_schedule_save(self, coordinator):
+        """Schedule a snapshot write; repeated calls within the delay collapse into one write."""
+        if self._save_pending:
+            return
+        self._save_pending = True
+        self._store.async_delay_save(lambda: self._build(coordinator), SNAPSHOT_SAVE_DELAY)
+
+    def _build(self, coordinator) -> dict:
+        """Build the snapshot payload at write time."""
+        self._save_pending = False
+        locks = {}
+        for lock in coordinator.lock_list:
+            lock_id = lock.get("lockId")
+            if not lock_id:
+                continue
+
+            entry = {}
+            if lock_id in coordinator.open_state_data:
+                entry["state"] = coordinator.open_state_data[lock_id]
+                entry["state_updated_at"] = coordinator.state_updated_at.get(lock_id)
+            if lock_id in coordinator.details_data:
+                entry["details"] = _compact(coordinator.details_data[lock_id], SNAPSHOT_DETAIL_FIELDS)
+                entry["details_updated_at"] = coordinator.details_updated_at.get(lock_id)
+            locks[str(lock_id)] = entry
+
+        return {
+            "saved_at": time.time(),
+            "lock_list": [_compact(lock, SNAPSHOT_LOCK_FIELDS) for lock in coordinator.lock_list],
+            "locks": locks,
+        }
+
+    async def async_remove(self):
+        await self._store.async_remove()
@@ -1,16 +1,38 @@
+import asyncio
 import logging
+import time
 from datetime import datetime, timezone, timedelta
 
 from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 
 from .const import (
+    STORAGE_VERSION,
+    TOKEN_STORAGE_KEY,
+    TOKEN_OPTION_KEYS,
     TOKEN_ENDPOINT,
     REFRESH_ENDPOINT,
     TOKEN_REFRESH_BUFFER_MINUTES,
+    TOKEN_REUSE_AT_STARTUP,
+    TOKEN_REFRESH_MAX_ATTEMPTS,
+    TOKEN_REFRESH_BACKOFF_SECONDS,
+    TOKEN_REFRESH_RETRY_AFTER_FAILURE,
 )
 
+from .api import SifelyApiClient, SifelyApiError, SifelyResponseError
+
 _LOGGER = logging.getLogger(__name__)
 
+
+class SifelyAuthError(SifelyApiError):
+    """Raised when the token could not be refreshed after all attempts."""
+
+
+def get_token_store(hass, entry_id: str) -> Store:
+    """Return the persistent token store for a config entry."""
+    return Store(hass, STORAGE_VERSION, TOKEN_STORAGE_KEY.format(entry_id=entry_id))
+
+
 class SifelyTokenManager:
     def __init__(self, client_id, email, password, session, hass, config_entry):
         self.client_id = client_id
@@ -26,29 +48,127 @@ class SifelyTokenManager:
         self._login_token = None
 
         self._refresh_unsub = None
+        self._refresh_task = None
+        self.refresh_failures = 0
+        self.last_refresh_error = None
+        self._retry_after = None  # Monotonic time before which requests do not start a new refresh
+        self.startup_timings = {}
+        self._store = get_token_store(hass, config_entry.entry_id)
+        self.api = SifelyApiClient(session, self)
 
     async def initialize(self):
-        """Entry point on integration boot."""
-        self._load_stored_tokens()
+        """Entry point on integration boot.
 
-        if self._is_token_valid():
+        A cached token that is still valid is used right away and its refresh is only
+        scheduled; a 401 on first use falls back to refresh/login via async_refresh.
+        """
+        started = time.monotonic()
+        await self._load_stored_tokens()
+        loaded = time.monotonic()
+        self.startup_timings = {"load_tokens": round(loaded - started, 3)}
+
+        if self._is_token_valid() and TOKEN_REUSE_AT_STARTUP:
+            _LOGGER.info("✅ Cached token valid until %s, using it and refreshing in the background.", self.token_expiry)
+            self.startup_timings["mode"] = "cached"
+            self._schedule_token_refresh()
+        elif self._is_token_valid():
             _LOGGER.info("✅ Cached token found, but forcing refresh at startup.")
-            await self._perform_token_refresh()
+            self.startup_timings["mode"] = "refresh"
+            await self.async_refresh()
         else:
             _LOGGER.info("🔐 No valid token found. Performing login...")
-            await self._perform_login()
-            await self._perform_token_refresh()
+            self.startup_timings["mode"] = "login"
+            await self.async_refresh(force_login=True)
 
-    def _load_stored_tokens(self):
-        opts = self.config_entry.options
-        self.access_token = opts.get("access_token")
-        self.refresh_token_value = opts.get("refresh_token")
-        expiry_ts = opts.get("token_expiry")
-        self._login_token = opts.get("login_token")
+        finished = time.monotonic()
+        if self.startup_timings["mode"] != "cached":
+            self.startup_timings["auth"] = round(finished - loaded, 3)
+        self.startup_timings["total"] = round(finished - started, 3)
+        _LOGGER.info("⏱️ Token startup (%s) took %.3fs: %s",
+                     self.startup_timings["mode"], self.startup_timings["total"], self.startup_timings)
+
+    @property
+    def auth_failed(self) -> bool:
+        """Return True if the last refresh gave up after all attempts."""
+        return self.last_refresh_error is not None
+
+    async def async_refresh(self, force_login: bool = False):
+        """Refresh the access token, sharing a single in-flight refresh between callers.
+
+        Concurrent callers (the scheduled refresh, 401 handling, startup) all await the
+        same task instead of each starting their own login. Raises SifelyAuthError
+        if every attempt fails.
+        """
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = self.hass.async_create_task(self._async_refresh_with_retry(force_login))
+        else:
+            _LOGGER.debug("🔄 Token refresh already in progress, waiting for it")
+
+        await asyncio.shield(self._refresh_task)
+
+    async def _async_refresh_with_retry(self, force_login: bool):
+        """Refresh (falling back to a full login) with bounded, backed-off attempts."""
+        use_login = force_login or not self.refresh_token_value
+        delay = TOKEN_REFRESH_BACKOFF_SECONDS
+
+        for attempt in range(1, TOKEN_REFRESH_MAX_ATTEMPTS + 1):
+            try:
+                if use_login:
+                    await self._perform_login()
+                await self._perform_token_refresh()
+                self.refresh_failures = 0
+                self.last_refresh_error = None
+                self._retry_after = None
+                return
+            except Exception as e:
+                self.last_refresh_error = str(e)
+                use_login = True  # Refresh token may be stale; log in again on the next attempt
+                if attempt < TOKEN_REFRESH_MAX_ATTEMPTS:
+                    _LOGGER.warning("⚠️ Token refresh attempt %d/%d failed, retrying in %ds: %s",
+                                    attempt, TOKEN_REFRESH_MAX_ATTEMPTS, delay, e)
+                    await asyncio.sleep(delay)
+                    delay *= 2
+
+        self.refresh_failures += 1
+        _LOGGER.error("❌ Token refresh failed after %d attempts; retrying in %ds: %s",
+                      TOKEN_REFRESH_MAX_ATTEMPTS, TOKEN_REFRESH_RETRY_AFTER_FAILURE, self.last_refresh_error)
+        self._retry_after = time.monotonic() + TOKEN_REFRESH_RETRY_AFTER_FAILURE
+        self._schedule_token_refresh(TOKEN_REFRESH_RETRY_AFTER_FAILURE)
+        raise SifelyAuthError(self.last_refresh_error)
+
+    async def _load_stored_tokens(self):
+        stored = await self._store.async_load()
+
+        if stored is None:
+            stored = await self._migrate_tokens_from_options()
+
+        self.access_token = stored.get("access_token")
+        self.refresh_token_value = stored.get("refresh_token")
+        expiry_ts = stored.get("token_expiry")
+        self._login_token = stored.get("login_token")
 
         if expiry_ts:
             self.token_expiry = datetime.fromisoformat(expiry_ts)
 
+    async def _migrate_tokens_from_options(self) -> dict:
+        """Move tokens saved by older versions out of the config entry options.
+
+        Runs before the options update listener is registered, so stripping the
+        options here does not trigger a reload.
+        """
+        opts = self.config_entry.options
+        legacy = {key: opts[key] for key in TOKEN_OPTION_KEYS if key in opts}
+        if not legacy:
+            return {}
+
+        _LOGGER.info("📦 Migrating stored tokens from config options to token storage")
+        await self._store.async_save(legacy)
+        self.hass.config_entries.async_update_entry(
+            self.config_entry,
+            options={k: v for k, v in opts.items() if k not in TOKEN_OPTION_KEYS},
+        )
+        return legacy
+
     def _is_token_valid(self):
         if not self.access_token or not self.token_expiry:
             return False
@@ -58,94 +178,106 @@ class SifelyTokenManager:
         _LOGGER.debug("🔐 Requesting Sifely login from: %s", TOKEN_ENDPOINT)
 
         try:
-            async with self.session.post(TOKEN_ENDPOINT, params={
+            data = await self.api.async_request("POST", TOKEN_ENDPOINT, auth=False, params={
                 "client_id": self.client_id,
                 "username": self.email,
                 "password": self.password,
-            }) as resp:
-                if resp.status != 200:
-                    raise Exception(f"Login HTTP error: {resp.status}")
-
-                resp_json = await resp.json(content_type=None)
-                _LOGGER.debug("🔁 Login response: %s", resp_json)
-
-                if resp_json.get("code") == 200 and "data" in resp_json:
-                    data = resp_json["data"]
-                    self._login_token = data.get("token")
-                    self.refresh_token_value = data.get("refreshToken")
-                else:
-                    raise Exception(f"Login failed: {resp_json}")
+            })
+            if not isinstance(data, dict):
+                raise SifelyResponseError(f"Login failed: {data}", payload=data)
+
+            self._login_token = data.get("token")
+            self.refresh_token_value = data.get("refreshToken")
         except Exception as e:
-            _LOGGER.exception("🚨 Exception during login: %s", str(e))
+            _LOGGER.warning("🚨 Exception during login: %s", str(e))
             raise
 
     async def _perform_token_refresh(self):
         _LOGGER.debug("🔄 Refreshing token from: %s", REFRESH_ENDPOINT)
 
         try:
-            async with self.session.post(REFRESH_ENDPOINT, params={
+            resp_json = await self.api.async_request("POST", REFRESH_ENDPOINT, auth=False, params={
                 "client_id": self.client_id,
                 "grant_type": "refresh_token",
                 "refresh_token": self.refresh_token_value,
-            }) as resp:
-                if resp.status != 200:
-                    raise Exception(f"Refresh HTTP error: {resp.status}")
-
-                resp_json = await resp.json(content_type=None)
-                _LOGGER.debug("🔁 Refresh token response: %s", resp_json)
-
-                if "access_token" in resp_json:
-                    self.access_token = resp_json["access_token"]
-                    self.refresh_token_value = resp_json.get("refresh_token", self.refresh_token_value)
-                    expires_in = resp_json.get("expires_in", 3600)
-                    self._set_token_expiry(expires_in)
-                    await self._store_token()
-                    _LOGGER.info("🔄 Token refreshed. Expires at: %s", self.token_expiry)
-                    self._schedule_token_refresh()
-                else:
-                    raise Exception(f"Refresh failed: {resp_json}")
+            })
+            if not isinstance(resp_json, dict) or "access_token" not in resp_json:
+                raise SifelyResponseError(f"Refresh failed: {resp_json}", payload=resp_json)
+
+            self.access_token = resp_json["access_token"]
+            self.refresh_token_value = resp_json.get("refresh_token", self.refresh_token_value)
+            expires_in = resp_json.get("expires_in", 3600)
+            self._set_token_expiry(expires_in)
+            await self._store_token()
+            _LOGGER.info("🔄 Token refreshed. Expires at: %s", self.token_expiry)
+            self._schedule_token_refresh()
         except Exception as e:
-            _LOGGER.exception("🚨 Exception during token refresh: %s", str(e))
-            await self._perform_login()
-            await self._perform_token_refresh()
+            _LOGGER.warning("🚨 Exception during token refresh: %s", str(e))
+            raise
 
     def _set_token_expiry(self, expires_in):
         now = datetime.now(timezone.utc)
         self.token_expiry = now + timedelta(seconds=expires_in)
 
-    def _schedule_token_refresh(self):
+    def _schedule_token_refresh(self, delay: float | None = None):
         if self._refresh_unsub:
             self._refresh_unsub()
 
-        now = datetime.now(timezone.utc)
-        delay = (self.token_expiry - timedelta(minutes=TOKEN_REFRESH_BUFFER_MINUTES) - now).total_seconds()
-        delay = max(delay, 30)
+        if delay is None:
+            now = datetime.now(timezone.utc)
+            delay = (self.token_expiry - timedelta(minutes=TOKEN_REFRESH_BUFFER_MINUTES) - now).total_seconds()
+            delay = max(delay, 30)
 
         _LOGGER.debug("⏳ Scheduling token refresh in %.2f seconds", delay)
         self._refresh_unsub = async_call_later(self.hass, delay, self._handle_token_refresh)
 
     async def _handle_token_refresh(self, _):
         _LOGGER.info("🔁 Token refresh scheduled task running...")
-        await self._perform_token_refresh()
+        self._refresh_unsub = None
+        try:
+            await self.async_refresh()
+        except SifelyAuthError:
+            pass  # Already logged; the next attempt has been scheduled
 
     async def _store_token(self):
-        opts = dict(self.config_entry.options)
-        opts.update({
+        """Persist tokens to the token store (never to options, which would reload the entry)."""
+        await self._store.async_save({
             "access_token": self.access_token,
             "refresh_token": self.refresh_token_value,
             "token_expiry": self.token_expiry.isoformat(),
             "login_token": self._login_token,
         })
-        self.hass.config_entries.async_update_entry(self.config_entry, options=opts)
+
+    async def async_get_access_token(self) -> str:
+        """Return a usable access token, refreshing first if it expires within the buffer.
+
+        After a failed refresh, requests raise SifelyAuthError until the scheduled
+        retry (TOKEN_REFRESH_RETRY_AFTER_FAILURE) instead of each starting a new login.
+        """
+        if not self.access_token or not self.token_expiry or (
+            datetime.now(timezone.utc) >= self.token_expiry - timedelta(minutes=TOKEN_REFRESH_BUFFER_MINUTES)
+        ):
+            _LOGGER.debug("⏳ Access token missing or about to expire, refreshing before request")
+            await self.async_request_refresh()
+        return self.access_token
+
+    async def async_request_refresh(self, force_login: bool = False):
+        """Refresh on behalf of a request, raising SifelyAuthError while a failed refresh cools down."""
+        if self._retry_after is not None and time.monotonic() < self._retry_after:
+            raise SifelyAuthError(f"Token refresh failed, next attempt in "
+                                  f"{self._retry_after - time.monotonic():.0f}s: {self.last_refresh_error}")
+        await self.async_refresh(force_login)
 
     def get_login_token(self):
         return self._login_token
 
     async def refresh_login_token(self):
-        await self._perform_login()
-        await self._perform_token_refresh()
+        await self.async_request_refresh(force_login=True)
 
     async def async_shutdown(self):
         if self._refresh_unsub:
             self._refresh_unsub()
             self._refresh_unsub = None
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            self._refresh_task = None